@@ -0,0 +1,31 @@
+# build_aot.py
+"""
+Ahead-of-time compile the pullback kernel with numba.pycc.
+
+    python build_aot.py
+
+Writes strategy/_pullback_aot.<platform>.so. pullback_detector imports it
+when present, so a restarted streamer does not pay the Numba JIT cost on
+the first evaluation. Without the built module (or without Numba) the
+JIT / pure-Python kernel from strategy._pullback_njit is used.
+
+Rebuild after changing anything in strategy/_pullback_njit.py or
+strategy/_fused_kernel.py.
+"""
+
+import os
+
+from numba.pycc import CC
+
+from strategy._pullback_njit import PULLBACK_CORE_SIG, _pullback_core
+
+
+def build():
+    cc = CC("_pullback_aot")
+    cc.output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "strategy")
+    cc.export("pullback_core", PULLBACK_CORE_SIG)(_pullback_core.py_func)
+    cc.compile()
+
+
+if __name__ == "__main__":
+    build()
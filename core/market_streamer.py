@@ -1,13 +1,22 @@
 # core/market_streamer.py
 
+import os
 import json
+import time
+import queue
 import datetime
+import threading
+import traceback
+
+import numpy as np
 import upstox_client
 from config.settings import ACCESS_TOKEN
 
-from strategy.scanner import MarketScanner
+from strategy.scanner import MarketScanner, EXCHANGE_TZ
 from strategy.vwap_filter import VWAPCalculator
 from strategy.strategy_engine import StrategyEngine
+from strategy.decision_engine import DState
+from strategy._jit_prewarm import prewarm
 
 from execution.execution_engine import ExecutionEngine
 from execution.order_executor import OrderExecutor
@@ -22,6 +31,9 @@ FEED_MODE = "full"
 with open("data/nifty500_keys.json", "r") as f:
     INSTRUMENT_LIST = json.load(f)
 
+# fixed instrument index for per-instrument flag arrays
+INST_IDX = {k: i for i, k in enumerate(INSTRUMENT_LIST)}
+
 # ---------------- CORE OBJECTS ----------------
 scanner = MarketScanner(max_len=600)
 vwap_calculators = {inst: VWAPCalculator() for inst in INSTRUMENT_LIST}
@@ -40,14 +52,140 @@ execution_engine = ExecutionEngine(
     trade_logger
 )
 
-signals_today = {}
+# signals_today[i] → INSTRUMENT_LIST[i] already entered today (exchange
+# date); only touched by the execution thread
+signals_today = np.zeros(len(INSTRUMENT_LIST), dtype=np.bool_)
+signals_day_end = 0.0  # epoch of the exchange-time midnight ending today
 ALLOW_NEW_TRADES = True
 
 
+# ---------------- WORKER THREADS ----------------
+# Instruments are sharded over N_SHARDS strategy workers by INST_IDX, so
+# each instrument's scanner ring, MTF buffers, VWAP calculator and engine
+# caches are only ever touched by one thread. Entries and exits all go
+# through a single execution thread.
+
+N_SHARDS = os.cpu_count() or 4
+
+# every tick is folded into the bars (highs / lows / volume), so the
+# inboxes are lossless; shard_lag tells how far behind a worker runs
+shard_inboxes = [queue.SimpleQueue() for _ in range(N_SHARDS)]
+
+# shard_lag[w]: seconds between arrival and processing of shard w's last message
+shard_lag = [0.0] * N_SHARDS
+SHARD_LAG_WARN = 1.0
+
+# ("entry", epoch now, (inst_key, decision, ltp)) | ("exits", None, None)
+exec_q = queue.SimpleQueue()
+
+# newest exit snapshot (epoch now, current_prices) not yet checked; an
+# "exits" item on exec_q is only queued when this was empty, so the
+# execution thread always checks the freshest prices, once
+_pending_exits = None
+_exits_lock = threading.Lock()
+
+
+def _shard_of(inst_key: str) -> int:
+    return INST_IDX.get(inst_key, hash(inst_key)) % N_SHARDS
+
+
+def _shard_worker(w: int):
+    inbox = shard_inboxes[w]
+    warned = False
+
+    while True:
+        now, rows = inbox.get()
+
+        lag = time.time() - now
+        shard_lag[w] = lag
+        if lag > SHARD_LAG_WARN and not warned:
+            print(f"[ShardWorker] shard {w} running {lag:.1f}s behind the feed")
+        warned = lag > SHARD_LAG_WARN
+
+        try:
+            # stamp ticks with their arrival time, not the dequeue time,
+            # so queueing never moves a tick into the next minute bar
+            ts = datetime.datetime.fromtimestamp(now, EXCHANGE_TZ)
+
+            updated = []
+            for inst_key, ltp, volume in rows:
+                scanner.append_tick(inst_key, ts, ltp, volume)
+                updated.append((inst_key, ltp))
+
+            decisions = strategy_engine.evaluate_many(updated)
+
+            for inst_key, ltp in updated:
+                decision = decisions.get(inst_key)
+                if decision and decision.state >= DState.EXECUTE_LONG:
+                    exec_q.put_nowait(("entry", now, (inst_key, decision, ltp)))
+        except Exception:
+            print("[ShardWorker] evaluation failed")
+            traceback.print_exc()
+
+
+def _roll_day(now: float):
+    global signals_day_end
+
+    # date objects only on day rollover; days follow the exchange clock
+    # (like the scanner's bars), so the reset never falls inside a session
+    if now >= signals_day_end:
+        today = datetime.datetime.fromtimestamp(now, EXCHANGE_TZ).date()
+        signals_today[:] = False
+        signals_day_end = datetime.datetime.combine(
+            today + datetime.timedelta(days=1), datetime.time(), tzinfo=EXCHANGE_TZ
+        ).timestamp()
+
+
+def _post_exits(now: float, current_prices: dict):
+    global _pending_exits
+
+    with _exits_lock:
+        idle = _pending_exits is None
+        _pending_exits = (now, current_prices)
+
+    if idle:
+        exec_q.put_nowait(("exits", None, None))
+
+
+def _take_exits():
+    global _pending_exits
+
+    with _exits_lock:
+        pending, _pending_exits = _pending_exits, None
+    return pending
+
+
+def _exec_worker():
+    while True:
+        kind, now, payload = exec_q.get()
+        if kind == "exits":
+            now, payload = _take_exits()
+
+        try:
+            _roll_day(now)
+
+            if kind == "entry":
+                inst_key, decision, ltp = payload
+                i = INST_IDX.get(inst_key)
+                if i is None or signals_today[i]:
+                    continue
+
+                signals_today[i] = True
+                execution_engine.handle_entry(inst_key, decision, ltp)
+            else:
+                execution_engine.handle_exits(payload, datetime.datetime.fromtimestamp(now))
+        except Exception:
+            print(f"[ExecWorker] {kind} handling failed")
+            traceback.print_exc()
+
+
 # ---------------- STREAMER ----------------
 def start_market_streamer():
     global ALLOW_NEW_TRADES
 
+    # compile / load the Numba kernels before the first tick
+    prewarm()
+
     config = upstox_client.Configuration()
     config.access_token = ACCESS_TOKEN
     api_client = upstox_client.ApiClient(config)
@@ -59,58 +197,39 @@ def start_market_streamer():
     )
 
     def on_message(message):
-        global ALLOW_NEW_TRADES
-
         feeds = message.get("feeds", {})
-        now = datetime.datetime.now()
-        today = now.date().isoformat()
-
-        if today not in signals_today:
-            signals_today[today] = set()
+        now = time.time()
 
         current_prices = {}
+        shard_rows = [[] for _ in range(N_SHARDS)]
 
         for inst_key, feed_info in feeds.items():
-            data = feed_info.get("fullFeed", {}).get("marketFF", {})
-
             try:
+                data = feed_info["fullFeed"]["marketFF"]
                 ltp = float(data["ltpc"]["ltp"])
-            except Exception:
+            except (KeyError, TypeError, ValueError):
                 continue
 
             current_prices[inst_key] = ltp
 
-            ohlc = data.get("marketOHLC", {}).get("ohlc", [])
-            if not ohlc:
-                continue
-
-            bar = ohlc[-1]
             try:
-                high = float(bar["high"])
-                low = float(bar["low"])
-                close = float(bar["close"])
-                volume = float(bar["vol"])
-            except Exception:
+                volume = float(data["marketOHLC"]["ohlc"][-1]["vol"])
+            except (KeyError, IndexError, TypeError, ValueError):
                 continue
 
-            # ---- Update Market State ----
-            scanner.update(inst_key, ltp, high, low, close, volume)
+            shard_rows[_shard_of(inst_key)].append((inst_key, ltp, volume))
 
-            # ---- Strategy Evaluation ----
-            decision = strategy_engine.evaluate(inst_key, ltp)
+        # ---- Market State + Strategy Evaluation (shard workers) ----
+        for inbox, rows in zip(shard_inboxes, shard_rows):
+            if rows:
+                inbox.put_nowait((now, rows))
 
-            if not decision:
-                continue
-
-            if decision.state.startswith("EXECUTE"):
-                if inst_key in signals_today[today]:
-                    continue
-
-                signals_today[today].add(inst_key)
-                execution_engine.handle_entry(inst_key, decision, ltp)
+        # ---- Exit Handling (execution thread, newest prices only) ----
+        _post_exits(now, current_prices)
 
-        # ---- Exit Handling ----
-        execution_engine.handle_exits(current_prices, now)
+    for w in range(N_SHARDS):
+        threading.Thread(target=_shard_worker, args=(w,), name=f"shard-{w}", daemon=True).start()
+    threading.Thread(target=_exec_worker, name="exec-worker", daemon=True).start()
 
     streamer.on("message", on_message)
     streamer.connect()
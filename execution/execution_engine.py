@@ -1,5 +1,8 @@
 # execution/execution_engine.py
 
+from strategy.decision_engine import to_log_dict
+
+
 class ExecutionEngine:
     def __init__(self, order_executor, trade_monitor, risk_manager, trade_logger):
         self.order_executor = order_executor
@@ -11,7 +14,7 @@ class ExecutionEngine:
         if not self.risk_manager.can_trade_now():
             return
 
-        side = "BUY" if "LONG" in decision.state else "SELL"
+        side = "BUY" if decision.direction == "LONG" else "SELL"
 
         order = self.order_executor.place_limit_order(
             inst_key=inst_key,
@@ -25,6 +28,9 @@ class ExecutionEngine:
         trade_id = order.get("order_id") or order.get("orderId")
         qty = order.get("quantity", 0)
 
+        # decision scores stay unrounded; round only for the log line
+        print(f"[ExecutionEngine] {inst_key} {side} entry: {to_log_dict(decision)}")
+
         self.trade_monitor.add_trade(
             trade_id=trade_id,
             inst_key=inst_key,
@@ -37,7 +43,7 @@ class ExecutionEngine:
         exits = self.trade_monitor.check_trades(current_prices)
 
         for trade_id, reason, exit_price in exits:
-            trade = self.trade_monitor.trades.get(trade_id)
+            trade = self.trade_monitor.active_trades.get(trade_id)
             if not trade:
                 continue
 
@@ -47,7 +53,7 @@ class ExecutionEngine:
                 quantity=trade.qty,
                 entry_price=trade.entry_price,
                 exit_price=exit_price,
-                entry_time=trade.entry_time,
+                entry_time=trade.open_time,
                 exit_time=now,
                 exit_reason=reason,
                 strategy="elite_intraday_v2"
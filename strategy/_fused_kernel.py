@@ -0,0 +1,72 @@
+# strategy/_fused_kernel.py
+"""
+Single-pass statistics over the tail of the 1m series.
+
+The pullback core needs ATR (true range of the last bars) and the volume
+average / trend of the last bars. Both used to be separate loops over
+highs/lows/closes and volumes; _tail_stats walks the tail once and
+produces all of them, with the same summation order as the separate
+loops (so results are bit-identical).
+"""
+
+import numpy as np
+
+from strategy._njit import njit
+
+
+@njit("Tuple((f8, f8, b1, b1))(f8[:], f8[:], f8[:], f8[:], i8, i8, i8)", cache=True, nogil=True)
+def _tail_stats(highs, lows, closes, volumes, atr_period, vol_lookback, rising_bars):
+    """
+    Returns (atr, avg_volume, vol_rising, vol_falling)
+
+    atr          mean true range of the last atr_period bars
+                 (NaN if highs has <= atr_period bars or closes is too short)
+    avg_volume   mean of the last vol_lookback volumes
+                 (NaN if there are fewer than vol_lookback + rising_bars volumes)
+    vol_rising   volume strictly rising over the last rising_bars bars
+    vol_falling  volume strictly falling over the last rising_bars bars
+    """
+    n = highs.shape[0]
+    m = volumes.shape[0]
+
+    atr_ok = n - 1 >= atr_period and closes.shape[0] >= n - 1
+    vol_ok = m >= vol_lookback + rising_bars
+
+    width = 0
+    if atr_ok:
+        width = atr_period
+    if vol_ok:
+        width = max(width, vol_lookback, rising_bars - 1)
+
+    tr_sum = 0.0
+    vol_sum = 0.0
+    rising = vol_ok
+    falling = vol_ok
+
+    # k bars back from the end, oldest -> newest
+    for k in range(width, 0, -1):
+        if atr_ok and k <= atr_period:
+            i = n - k
+            tr = highs[i] - lows[i]
+            hc = abs(highs[i] - closes[i - 1])
+            lc = abs(lows[i] - closes[i - 1])
+            if hc > tr:
+                tr = hc
+            if lc > tr:
+                tr = lc
+            tr_sum += tr
+
+        if vol_ok:
+            j = m - k
+            if k <= vol_lookback:
+                vol_sum += volumes[j]
+            if k < rising_bars:
+                if not volumes[j] > volumes[j - 1]:
+                    rising = False
+                if not volumes[j] < volumes[j - 1]:
+                    falling = False
+
+    atr = tr_sum / atr_period if atr_ok else np.nan
+    avg_volume = vol_sum / vol_lookback if vol_ok else np.nan
+
+    return atr, avg_volume, rising, falling
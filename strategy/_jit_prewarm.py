@@ -0,0 +1,33 @@
+# strategy/_jit_prewarm.py
+"""
+Warm up the Numba kernels before the first live tick. Call prewarm()
+from the entry point (core.market_streamer does at startup); importing
+this module does nothing by itself.
+
+The kernels carry explicit signatures, so importing their modules
+compiles them eagerly, or loads them from the on-disk cache
+(cache=True). Calling each entry point once on dummy data also moves
+the first-call dispatch cost off the first live tick.
+
+Without Numba this only runs the pure-Python kernels once, which is cheap.
+"""
+
+import numpy as np
+
+from strategy.volatility_filter import compute_atr
+from strategy.market_regime import detect_market_regime
+from strategy.pullback_detector import detect_pullback_signal
+
+
+def prewarm():
+    closes = np.linspace(100.0, 101.0, 64)
+    highs = closes + 0.5
+    lows = closes - 0.5
+    volumes = np.full(64, 1000.0)
+
+    compute_atr(highs, lows, closes)
+    detect_market_regime(highs, lows, closes)
+    detect_pullback_signal(
+        closes, highs, lows, closes, volumes, "BULLISH",
+        sr_levels={"supports": [{"level": 100.9, "strength": 1}], "resistances": []}
+    )
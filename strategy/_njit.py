@@ -0,0 +1,24 @@
+# strategy/_njit.py
+"""
+Optional Numba support for the numeric kernels.
+
+`njit` is numba.njit when Numba is installed. Without Numba it is a no-op
+decorator and the kernels run as plain Python over NumPy arrays, so the
+strategy keeps working (only slower).
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # used bare (@njit) or with options (@njit(cache=True))
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
@@ -0,0 +1,254 @@
+# strategy/_pullback_njit.py
+"""
+Numeric core of detect_pullback_signal.
+
+Everything here works on float64 NumPy arrays and returns integer codes,
+so it can be compiled with Numba. The Python wrapper in pullback_detector
+turns the codes back into the usual dicts / labels.
+
+Ports (same thresholds and evaluation order as the Python versions):
+- volatility_filter.compute_atr / analyze_volatility
+- price_action.rejection_info
+- sr_levels.get_nearest_sr
+- volume_filter.analyze_volume (score + strength only)
+
+ATR and the volume statistics come from one pass over the series tail
+(_fused_kernel._tail_stats).
+"""
+
+import numpy as np
+
+from strategy._njit import njit
+from strategy._fused_kernel import _tail_stats
+
+
+# nearest SR side
+SIDE_NONE = 0
+SIDE_SUPPORT = 1
+SIDE_RESISTANCE = 2
+
+# volatility states (analyze_volatility)
+VOLAT_UNKNOWN = 0
+VOLAT_CONTRACTING = 1
+VOLAT_BUILDING = 2
+VOLAT_EXPANDING = 3
+VOLAT_EXHAUSTION = 4
+
+# volume strength (analyze_volume)
+VOL_NONE = 0
+VOL_WEAK = 1
+VOL_MODERATE = 2
+VOL_STRONG = 3
+
+# rejection / direction: +1 bullish (LONG), -1 bearish (SHORT), 0 none
+
+# (direction, total_score, sr_side, sr_idx, sr_dist,
+#  price_reaction, volume_ok, volat_state, momentum_ok, volume_strength, rejection,
+#  atr, volume_score, volume_trend)
+#   <- (highs, lows, closes, volumes, sup_levels, res_levels, htf_dir_code, max_prox, atr_in)
+PULLBACK_CORE_SIG = (
+    "Tuple((i8, f8, i8, i8, f8, b1, b1, i8, b1, i8, i8, f8, f8, i8))"
+    "(f8[:], f8[:], f8[:], f8[:], f8[:], f8[:], i8, f8, f8)"
+)
+
+
+@njit("i8(f8, f8)", cache=True, nogil=True)
+def _volatility_state(current_move, atr):
+    if not atr > 0:
+        return VOLAT_UNKNOWN
+
+    move_pct_atr = abs(current_move) / atr
+
+    if move_pct_atr < 0.6:
+        return VOLAT_CONTRACTING
+    if move_pct_atr < 1.2:
+        return VOLAT_BUILDING
+    if move_pct_atr < 1.8:
+        return VOLAT_EXPANDING
+    return VOLAT_EXHAUSTION
+
+
+@njit("i8(f8, f8, f8, f8)", cache=True, nogil=True)
+def _rejection_code(open_p, high, low, close):
+    body = abs(close - open_p)
+    total_range = max(high - low, 1e-9)
+
+    upper_wick = max(0.0, high - max(close, open_p))
+    lower_wick = max(0.0, min(close, open_p) - low)
+
+    upper_rel = upper_wick / total_range
+    lower_rel = lower_wick / total_range
+    body_rel = body / total_range
+
+    code = 0
+    score = 0.0
+
+    if lower_rel > body_rel * 1.5 and lower_rel > 0.12:
+        code = 1
+        score = min(1.0, (lower_rel - 0.12) / 0.6)
+    elif upper_rel > body_rel * 1.5 and upper_rel > 0.12:
+        code = -1
+        score = min(1.0, (upper_rel - 0.12) / 0.6)
+
+    # small noise guard
+    if score < 0.05:
+        code = 0
+
+    return code
+
+
+@njit("Tuple((f8, i8))(f8, f8, b1, b1, f8[:], i8)", cache=True, nogil=True)
+def _volume_score(avg_volume, current_volume, rising, falling, closes, rising_bars):
+    # avg_volume / rising / falling from _tail_stats; NaN average = too little data
+    if np.isnan(avg_volume):
+        return 0.0, VOL_NONE
+
+    rel = current_volume / avg_volume if avg_volume > 0 else 1.0
+
+    if rel >= 1.8:
+        strength = VOL_STRONG
+        score = 2.0
+    elif rel >= 1.4:
+        strength = VOL_MODERATE
+        score = 1.2
+    elif rel >= 0.95:
+        strength = VOL_WEAK
+        score = 0.4
+    else:
+        strength = VOL_NONE
+        score = -0.5
+
+    if rising:
+        score += 0.5
+    elif falling:
+        score -= 0.5
+
+    m = closes.shape[0]
+    if m >= rising_bars:
+        price_move = closes[m - 1] - closes[m - rising_bars]
+        if abs(price_move) < 0.002 * closes[m - 1] and strength >= VOL_MODERATE:
+            score -= 0.7
+
+    return max(min(score, 2.0), -2.0), strength
+
+
+@njit("Tuple((i8, i8, f8))(f8, f8[:], f8[:])", cache=True, nogil=True)
+def _nearest_sr(price, sup_levels, res_levels):
+    side = SIDE_NONE
+    idx = -1
+    best_dist = np.inf
+
+    for i in range(sup_levels.shape[0]):
+        lvl = sup_levels[i]
+        dist = abs(price - lvl) / max(lvl, 1e-9)
+        if dist < best_dist:
+            best_dist = dist
+            side = SIDE_SUPPORT
+            idx = i
+
+    # resistance distances share the denominator; divide (not multiply by
+    # a reciprocal) so distances match sr_levels.get_nearest_sr exactly
+    price_den = max(price, 1e-9)
+    for i in range(res_levels.shape[0]):
+        lvl = res_levels[i]
+        dist = abs(lvl - price) / price_den
+        if dist < best_dist:
+            best_dist = dist
+            side = SIDE_RESISTANCE
+            idx = i
+
+    return side, idx, best_dist
+
+
+@njit(PULLBACK_CORE_SIG, cache=True, nogil=True)
+def _pullback_core(highs, lows, closes, volumes, sup_levels, res_levels, htf_dir_code, max_prox, atr_in):
+    """
+    Returns
+      (direction, total_score, sr_side, sr_idx, sr_dist,
+       price_reaction, volume_ok, volat_state, momentum_ok, volume_strength, rejection,
+       atr, volume_score, volume_trend)
+
+    direction is +1 (LONG), -1 (SHORT) or 0 when there is no setup.
+    atr_in is a precomputed ATR, or NaN to compute it from highs/lows/closes;
+    atr is the value actually used (NaN if the setup failed before step 2,
+    which is where it is computed). volume_score / volume_trend (+1 rising,
+    -1 falling, 0 flat) are analyze_volume's score and trend, valid once
+    step 5 ran.
+    """
+    last_price = closes[-1]
+
+    # 1) structural location
+    side, idx, dist = _nearest_sr(last_price, sup_levels, res_levels)
+
+    if side == SIDE_NONE or dist > max_prox:
+        return 0, 0.0, side, idx, dist, False, False, VOLAT_UNKNOWN, False, VOL_NONE, 0, np.nan, 0.0, 0
+
+    if side == SIDE_SUPPORT and htf_dir_code == 1:
+        direction = 1
+    elif side == SIDE_RESISTANCE and htf_dir_code == -1:
+        direction = -1
+    else:
+        return 0, 0.0, side, idx, dist, False, False, VOLAT_UNKNOWN, False, VOL_NONE, 0, np.nan, 0.0, 0
+
+    # 2) extension filter
+    recent_move = abs(closes[-1] - closes[-6])
+
+    atr_calc, avg_volume, vol_rising, vol_falling = _tail_stats(highs, lows, closes, volumes, 14, 20, 4)
+
+    atr = atr_in
+    if np.isnan(atr):
+        atr = atr_calc
+
+    if atr > 0 and recent_move > atr * 1.6:
+        return 0, 0.0, side, idx, dist, False, False, VOLAT_UNKNOWN, False, VOL_NONE, 0, atr, 0.0, 0
+
+    # 3) volatility quality
+    volat = _volatility_state(closes[-1] - closes[-2], atr)
+
+    if volat == VOLAT_CONTRACTING or volat == VOLAT_EXHAUSTION:
+        return 0, 0.0, side, idx, dist, False, False, volat, False, VOL_NONE, 0, atr, 0.0, 0
+
+    # 4) price action confirmation
+    rejection = _rejection_code(closes[-2], highs[-1], lows[-1], closes[-1])
+
+    price_reaction = rejection == direction
+    if direction == 1 and closes[-1] > closes[-3]:
+        price_reaction = True
+    if direction == -1 and closes[-1] < closes[-3]:
+        price_reaction = True
+
+    # 5) volume confirmation
+    vol_score, vol_strength = _volume_score(avg_volume, volumes[-1], vol_rising, vol_falling, closes, 4)
+    volume_ok = vol_score >= 0.6
+
+    vol_trend = 0
+    if vol_rising:
+        vol_trend = 1
+    elif vol_falling:
+        vol_trend = -1
+
+    # 6) momentum
+    short_term_trend = closes[-1] - closes[-5]
+    momentum_ok = (direction == 1 and short_term_trend > 0) or (direction == -1 and short_term_trend < 0)
+
+    # 7) scoring (same summation order as the components dict)
+    location = (max_prox - dist) * 60
+    if location < 0.0:
+        location = 0.0
+    if location > 2.0:
+        location = 2.0
+
+    total = location
+    if price_reaction:
+        total += 2.0
+    if volume_ok:
+        total += 1.5
+    if volat == VOLAT_EXPANDING:
+        total += 1.2
+    if momentum_ok:
+        total += 1.3
+
+    return (
+        direction, total, side, idx, dist, price_reaction, volume_ok, volat,
+        momentum_ok, vol_strength, rejection, atr, vol_score, vol_trend
+    )
@@ -1,5 +1,4 @@
 from collections import defaultdict
-from datetime import datetime
 from typing import Optional, Dict
 
 
@@ -9,22 +8,22 @@ class Candle5mBuilder:
 
     update(...) returns True ONLY when a 5m candle closes.
     Strategy should evaluate only on True.
+
+    Bars are keyed by the feed's epoch-millisecond timestamp. A candle's
+    "time" is its integer 5-minute bucket (ts_ms // BUCKET_MS); the
+    bucket start in ms is time * BUCKET_MS.
     """
 
+    BUCKET_MS = 300_000
+
     def __init__(self):
         self._buffers: Dict[str, Dict] = defaultdict(dict)
-        self._last_5m_time: Dict[str, str] = {}
-
-    def _floor_5m(self, iso_time: str) -> str:
-        dt = datetime.fromisoformat(iso_time)
-        minute = (dt.minute // 5) * 5
-        floored = dt.replace(minute=minute, second=0, microsecond=0)
-        return floored.isoformat()
+        self._last_5m_time: Dict[str, int] = {}
 
     def update(
         self,
         inst: str,
-        time_iso: str,
+        ts_ms: int,
         open_p: float,
         high_p: float,
         low_p: float,
@@ -39,7 +38,7 @@ class Candle5mBuilder:
             False → still building
         """
 
-        bucket = self._floor_5m(time_iso)
+        bucket = ts_ms // self.BUCKET_MS
         buf = self._buffers.get(inst)
 
         # start new 5m buffer
@@ -76,5 +75,5 @@ class Candle5mBuilder:
     def get_latest(self, inst: str) -> Optional[Dict]:
         return self._buffers.get(inst)
 
-    def get_last_closed_time(self, inst: str) -> Optional[str]:
+    def get_last_closed_time(self, inst: str) -> Optional[int]:
         return self._last_5m_time.get(inst)
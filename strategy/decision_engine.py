@@ -1,6 +1,7 @@
 # strategy/decision_engine.py
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, is_dataclass
+from enum import Enum, IntEnum
 from typing import Optional, Dict
 
 from strategy.volume_filter import analyze_volume
@@ -9,193 +10,356 @@ from strategy.liquidity_filter import analyze_liquidity
 from strategy.price_action import price_action_context
 from strategy.sr_levels import sr_location_score
 from strategy.vwap_filter import VWAPContext
+from strategy.signal_context import SignalContext
 
 
 # =========================
 # Output Structure
 # =========================
 
-@dataclass
+class DState(IntEnum):
+    """
+    Decision states, ordered so that `state >= DState.EXECUTE_LONG`
+    means "execute".
+    """
+    IGNORE = 0
+    PREPARE_LONG = 1
+    PREPARE_SHORT = 2
+    EXECUTE_LONG = 3
+    EXECUTE_SHORT = 4
+
+
+_PREPARE = {"LONG": DState.PREPARE_LONG, "SHORT": DState.PREPARE_SHORT}
+_EXECUTE = {"LONG": DState.EXECUTE_LONG, "SHORT": DState.EXECUTE_SHORT}
+
+
+@dataclass(slots=True)
+class Components:
+    """
+    Score contributions of one decision (0.0 = stage not reached / no
+    contribution), plus the labels StrategyEngine attaches for debugging.
+    """
+    structure: float = 0.0
+    htf: float = 0.0
+    regime: float = 0.0
+    vwap: float = 0.0
+    volume: float = 0.0
+    volatility: float = 0.0
+    liquidity: float = 0.0
+    price_action: float = 0.0
+    sr: float = 0.0
+    mtf_label: Optional[str] = None
+    htf_label: Optional[str] = None
+    regime_label: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        """Plain dict for logging / JSON (labels only when set)."""
+        out = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if value is not None:
+                out[f.name] = value
+        return out
+
+
+@dataclass(slots=True, frozen=True)
 class DecisionResult:
-    state: str                 # IGNORE | PREPARE_LONG | PREPARE_SHORT | EXECUTE_LONG | EXECUTE_SHORT
+    state: DState
     score: float               # 0 – 10
     direction: Optional[str]
-    components: Dict[str, float]
+    components: Components
     reason: str
 
 
+def to_log_dict(ctx, ndigits: int = 3) -> Dict[str, object]:
+    """
+    Dict form of a result / context (dataclass or dict) for logs and
+    JSON: floats rounded to `ndigits`, enums by name, nested dataclasses
+    and dicts converted the same way. Scores stay unrounded everywhere
+    else; this is the one place that rounds for display.
+    """
+    if is_dataclass(ctx):
+        items = [(f.name, getattr(ctx, f.name)) for f in fields(ctx)]
+    else:
+        items = ctx.items()
+
+    out = {}
+    for key, value in items:
+        if isinstance(value, float):
+            value = round(value, ndigits)
+        elif isinstance(value, Enum):
+            value = value.name
+        elif is_dataclass(value) or isinstance(value, dict):
+            value = to_log_dict(value, ndigits)
+        out[key] = value
+    return out
+
+
 # =========================
-# NEW PULLBACK BASED ENGINE
+# Thresholds
 # =========================
 
-def final_trade_decision(
-    inst_key: str,
-    prices: list[float],
-    highs: list[float],
-    lows: list[float],
-    closes: list[float],
-    volumes: list[float],
-    market_regime: str,
-    htf_bias_direction: str,
-    vwap_ctx: VWAPContext,
-    pullback_signal: Optional[Dict],
-) -> DecisionResult:
-
-    components: Dict[str, float] = {}
-    score = 0.0
-
-    # ==================================================
-    # 1️⃣ STRUCTURE GATE (MOST IMPORTANT)
-    # ==================================================
-
-    if not pullback_signal:
-        return DecisionResult("IGNORE", 0.0, None, {}, "no pullback setup")
-
-    direction = pullback_signal["direction"]
-    signal_type = pullback_signal["signal"]
-
-    # Potential setups only PREPARE
-    if signal_type == "POTENTIAL":
-        components["structure"] = 1.5
-        return DecisionResult(
-            state=f"PREPARE_{direction}",
-            score=1.5,
-            direction=direction,
-            components=components,
-            reason="potential pullback"
-        )
+@dataclass(frozen=True, kw_only=True)
+class Thresholds:
+    execute: float = 6.5       # score >= execute → EXECUTE_*
+    prepare: float = 5.0       # score >= prepare → PREPARE_*
+    sr_weight: float = 1.2     # weight of the SR location score
 
-    # CONFIRMED pullback gets structural priority
-    components["structure"] = 3.0
-    score += 3.0
 
-    # ==================================================
-    # 2️⃣ HIGHER TIMEFRAME AUTHORITY
-    # ==================================================
+DEFAULT_THRESHOLDS = Thresholds()
 
-    if direction == "LONG" and htf_bias_direction != "BULLISH":
-        return DecisionResult("IGNORE", 0.0, None, {}, "htf not bullish")
 
-    if direction == "SHORT" and htf_bias_direction != "BEARISH":
-        return DecisionResult("IGNORE", 0.0, None, {}, "htf not bearish")
-
-    components["htf"] = 1.5
-    score += 1.5
+# =========================
+# Score Ceilings
+# =========================
 
-    # ==================================================
-    # 3️⃣ MARKET REGIME GATE
-    # ==================================================
+# best score each later stage can add (clamps in the respective filters);
+# used to stop as soon as PREPARE is out of reach
+VOLUME_MAX = 2.0           # analyze_volume
+VOLATILITY_MAX = 1.5       # analyze_volatility
+LIQUIDITY_MAX = 2.0        # analyze_liquidity
+PRICE_ACTION_MAX = 1.0     # price_action_context
+SR_MAX = 1.0               # sr_location_score (before sr_weight)
 
-    if market_regime in ("WEAK", "COMPRESSION"):
-        return DecisionResult("IGNORE", 0.0, None, {}, "bad market regime")
 
-    if market_regime == "EARLY_TREND":
-        components["regime"] = 1.0
-        score += 1.0
-    elif market_regime == "TRENDING":
-        components["regime"] = 1.4
-        score += 1.4
+# =========================
+# NEW PULLBACK BASED ENGINE
+# =========================
 
-    # ==================================================
-    # 4️⃣ VWAP CONTEXT (ENVIRONMENT FILTER)
-    # ==================================================
+def _final_score(score: float) -> float:
+    return round(max(min(score, 10.0), 0.0), 2)
+
+
+def _insufficient_edge(score: float, components: Components) -> DecisionResult:
+    """IGNORE carrying the partial score / components, as the full path reports them."""
+    return DecisionResult(DState.IGNORE, _final_score(score), None, components, "insufficient edge")
+
+
+def make_decider(thresholds: Thresholds = DEFAULT_THRESHOLDS):
+    """
+    Build a final_trade_decision function with the given thresholds
+    bound as closure constants (no attribute lookups per call).
+
+    Gates run cheapest first. After each scoring stage the decider stops
+    with IGNORE once the score plus the best the remaining stages can add
+    cannot reach `prepare`, so hopeless setups skip the remaining filters.
+    Those results still carry the score and components reached so far.
+    """
+    execute_at = thresholds.execute
+    prepare_at = thresholds.prepare
+    sr_weight = thresholds.sr_weight
+
+    # the final score is rounded to 2 decimals; keep half a cent of slack
+    # so an early exit never drops a setup that would round up to prepare
+    reach = prepare_at - 0.005
+
+    # best possible score still to come after each stage
+    after_pa = SR_MAX * abs(sr_weight)
+    after_liquidity = PRICE_ACTION_MAX + after_pa
+    after_volatility = LIQUIDITY_MAX + after_liquidity
+    after_volume = VOLATILITY_MAX + after_volatility
+    after_vwap = VOLUME_MAX + after_volume
+
+    def final_trade_decision(
+        inst_key: str,
+        prices: list[float],
+        highs: list[float],
+        lows: list[float],
+        closes: list[float],
+        volumes: list[float],
+        market_regime: str,
+        htf_bias_direction: str,
+        vwap_ctx: VWAPContext,
+        pullback_signal: Optional[Dict],
+        signal_ctx: Optional[SignalContext] = None,
+    ) -> DecisionResult:
+        """
+        signal_ctx: the SignalContext the pullback detector already filled
+        for these arrays (build_context). Its atr / vol_ctx / avg_volume
+        are used instead of recomputing them here; missing ones are
+        computed as usual.
+        """
+
+        # ==================================================
+        # 1️⃣ STRUCTURE GATE (MOST IMPORTANT)
+        # ==================================================
+
+        if not pullback_signal:
+            return DecisionResult(DState.IGNORE, 0.0, None, Components(), "no pullback setup")
+
+        direction = pullback_signal["direction"]
+        signal_type = pullback_signal["signal"]
+
+        # Potential setups only PREPARE
+        if signal_type == "POTENTIAL":
+            return DecisionResult(
+                state=_PREPARE[direction],
+                score=1.5,
+                direction=direction,
+                components=Components(structure=1.5),
+                reason="potential pullback"
+            )
+
+        # ==================================================
+        # 2️⃣ HIGHER TIMEFRAME AUTHORITY
+        # ==================================================
 
-    if direction == "LONG" and vwap_ctx.acceptance == "BELOW":
-        return DecisionResult("IGNORE", 0.0, None, {}, "below VWAP")
+        if direction == "LONG" and htf_bias_direction != "BULLISH":
+            return DecisionResult(DState.IGNORE, 0.0, None, Components(), "htf not bullish")
+
+        if direction == "SHORT" and htf_bias_direction != "BEARISH":
+            return DecisionResult(DState.IGNORE, 0.0, None, Components(), "htf not bearish")
+
+        # ==================================================
+        # 3️⃣ MARKET REGIME GATE
+        # ==================================================
+
+        if market_regime in ("WEAK", "COMPRESSION"):
+            return DecisionResult(DState.IGNORE, 0.0, None, Components(), "bad market regime")
+
+        # ==================================================
+        # 4️⃣ VWAP CONTEXT (ENVIRONMENT FILTER)
+        # ==================================================
+
+        if direction == "LONG" and vwap_ctx.acceptance == "BELOW":
+            return DecisionResult(DState.IGNORE, 0.0, None, Components(), "below VWAP")
+
+        if direction == "SHORT" and vwap_ctx.acceptance == "ABOVE":
+            return DecisionResult(DState.IGNORE, 0.0, None, Components(), "above VWAP")
+
+        # all cheap gates passed: CONFIRMED pullback gets structural priority,
+        # plus the HTF / regime / VWAP contributions
+
+        components = Components(structure=3.0, htf=1.5)
+        score = 3.0 + 1.5
+
+        if market_regime == "EARLY_TREND":
+            components.regime = 1.0
+            score += 1.0
+        elif market_regime == "TRENDING":
+            components.regime = 1.4
+            score += 1.4
+
+        components.vwap = vwap_ctx.score
+        score += vwap_ctx.score
+
+        if score + after_vwap < reach:
+            return _insufficient_edge(score, components)
+
+        # ==================================================
+        # 5️⃣ VOLUME QUALITY
+        # ==================================================
+
+        if signal_ctx is None:
+            signal_ctx = SignalContext(highs, lows, closes, volumes)
+
+        vol_ctx = signal_ctx.vol_ctx
+        if vol_ctx is None:
+            vol_ctx = analyze_volume(volumes, close_prices=closes)
+
+        if vol_ctx.score < 0:
+            return DecisionResult(DState.IGNORE, 0.0, None, Components(), "bad volume")
+
+        components.volume = vol_ctx.score
+        score += vol_ctx.score
+
+        if score + after_volume < reach:
+            return _insufficient_edge(score, components)
+
+        # ==================================================
+        # 6️⃣ VOLATILITY QUALITY
+        # ==================================================
 
-    if direction == "SHORT" and vwap_ctx.acceptance == "ABOVE":
-        return DecisionResult("IGNORE", 0.0, None, {}, "above VWAP")
+        # the pullback detector already measured ATR on the same series
+        atr = signal_ctx.atr
+        if atr is None:
+            atr = pullback_signal.get("atr")
+        if atr is None:
+            atr = compute_atr(highs, lows, closes)
+        move = closes[-1] - closes[-2] if len(closes) > 1 else 0.0
 
-    components["vwap"] = vwap_ctx.score
-    score += vwap_ctx.score
+        volat_ctx = analyze_volatility(move, atr)
 
-    # ==================================================
-    # 5️⃣ VOLUME QUALITY
-    # ==================================================
+        if volat_ctx.state in ["CONTRACTING", "EXHAUSTION"]:
+            return DecisionResult(DState.IGNORE, 0.0, None, Components(), "bad volatility")
 
-    vol_ctx = analyze_volume(volumes, close_prices=closes)
+        components.volatility = volat_ctx.score
+        score += volat_ctx.score
 
-    if vol_ctx.score < 0:
-        return DecisionResult("IGNORE", 0.0, None, {}, "bad volume")
+        if score + after_volatility < reach:
+            return _insufficient_edge(score, components)
 
-    components["volume"] = vol_ctx.score
-    score += vol_ctx.score
+        # ==================================================
+        # 7️⃣ LIQUIDITY SAFETY
+        # ==================================================
 
-    # ==================================================
-    # 6️⃣ VOLATILITY QUALITY
-    # ==================================================
+        liq_ctx = analyze_liquidity(volumes, avg_vol=signal_ctx.avg_volume)
 
-    atr = compute_atr(highs, lows, closes)
-    move = closes[-1] - closes[-2] if len(closes) > 1 else 0.0
+        if liq_ctx.score < 0:
+            return DecisionResult(DState.IGNORE, 0.0, None, Components(), "illiquid instrument")
 
-    volat_ctx = analyze_volatility(move, atr)
+        components.liquidity = liq_ctx.score
+        score += liq_ctx.score
 
-    if volat_ctx.state in ["CONTRACTING", "EXHAUSTION"]:
-        return DecisionResult("IGNORE", 0.0, None, {}, "bad volatility")
+        if score + after_liquidity < reach:
+            return _insufficient_edge(score, components)
 
-    components["volatility"] = volat_ctx.score
-    score += volat_ctx.score
+        # ==================================================
+        # 8️⃣ PRICE ACTION TIMING
+        # ==================================================
 
-    # ==================================================
-    # 7️⃣ LIQUIDITY SAFETY
-    # ==================================================
+        pa_ctx = price_action_context(
+            prices=closes,
+            highs=highs,
+            lows=lows,
+            opens=closes,
+            closes=closes
+        )
 
-    liq_ctx = analyze_liquidity(volumes)
+        components.price_action = pa_ctx["score"]
+        score += pa_ctx["score"]
 
-    if liq_ctx.score < 0:
-        return DecisionResult("IGNORE", 0.0, None, {}, "illiquid instrument")
+        if score + after_pa < reach:
+            return _insufficient_edge(score, components)
 
-    components["liquidity"] = liq_ctx.score
-    score += liq_ctx.score
+        # ==================================================
+        # 9️⃣ SR LOCATION CONFIRMATION
+        # ==================================================
 
-    # ==================================================
-    # 8️⃣ PRICE ACTION TIMING
-    # ==================================================
+        nearest = pullback_signal.get("nearest_level")
 
-    pa_ctx = price_action_context(
-        prices=closes,
-        highs=highs,
-        lows=lows,
-        opens=closes,
-        closes=closes
-    )
+        sr_score = sr_location_score(closes[-1], nearest, direction)
 
-    components["price_action"] = pa_ctx["score"]
-    score += pa_ctx["score"]
+        components.sr = sr_score
+        score += sr_score * sr_weight
 
-    # ==================================================
-    # 9️⃣ SR LOCATION CONFIRMATION
-    # ==================================================
+        # ==================================================
+        # 🔟 FINAL DECISION LOGIC
+        # ==================================================
 
-    nearest = pullback_signal.get("nearest_level")
+        score = _final_score(score)
 
-    sr_score = sr_location_score(closes[-1], nearest, direction)
+        if score >= execute_at:
+            state = _EXECUTE[direction]
+            reason = "high quality pullback trade"
 
-    components["sr"] = sr_score
-    score += sr_score * 1.2
+        elif score >= prepare_at:
+            state = _PREPARE[direction]
+            reason = "developing pullback setup"
 
-    # ==================================================
-    # 🔟 FINAL DECISION LOGIC
-    # ==================================================
+        else:
+            state = DState.IGNORE
+            reason = "insufficient edge"
 
-    score = round(max(min(score, 10.0), 0.0), 2)
+        return DecisionResult(
+            state=state,
+            score=score,
+            direction=direction if state != DState.IGNORE else None,
+            components=components,
+            reason=reason
+        )
 
-    if score >= 6.5:
-        state = f"EXECUTE_{direction}"
-        reason = "high quality pullback trade"
+    return final_trade_decision
 
-    elif score >= 5.0:
-        state = f"PREPARE_{direction}"
-        reason = "developing pullback setup"
 
-    else:
-        state = "IGNORE"
-        reason = "insufficient edge"
-
-    return DecisionResult(
-        state=state,
-        score=score,
-        direction=direction if state != "IGNORE" else None,
-        components=components,
-        reason=reason
-    )
+final_trade_decision = make_decider(DEFAULT_THRESHOLDS)
@@ -1,8 +1,12 @@
 from dataclasses import dataclass
-from typing import Optional, List, Dict
+from operator import itemgetter
+from typing import Optional, List, Dict, Tuple
 from strategy.indicators import exponential_moving_average
 
 
+_CLOSE = itemgetter("close")
+
+
 # ------------------------
 # HTF Bias Output
 # ------------------------
@@ -14,6 +18,19 @@ class HTFBias:
     comment: str
 
 
+@dataclass
+class HTFStructure:
+    """
+    EMA / structure part of the HTF bias, before the VWAP adjustment.
+    Only depends on the 5m candles, so it can be cached per bar.
+    `neutral` holds the final result when no direction was found.
+    """
+    direction: str
+    strength: float
+    comment: Tuple[str, ...]
+    neutral: Optional[HTFBias] = None
+
+
 # ------------------------
 # HTF Bias Logic (5m candles)
 # ------------------------
@@ -35,21 +52,38 @@ def get_htf_bias(
         "low": ...,
         "close": ...
     }
+
+    Same as apply_vwap_bias(get_htf_structure(...), last close, vwap_value).
+    """
+    structure = get_htf_structure(candles_5m, short_period, long_period)
+    price = candles_5m[-1]["close"] if candles_5m else None
+    return apply_vwap_bias(structure, price, vwap_value, vwap_tolerance)
+
+
+def _neutral(strength: float, comment: str) -> HTFStructure:
+    return HTFStructure("NEUTRAL", strength, (), HTFBias("NEUTRAL", strength, "NEUTRAL", comment))
+
+
+def get_htf_structure(
+    candles_5m: List[Dict],
+    short_period: int = 21,
+    long_period: int = 55
+) -> HTFStructure:
+    """
+    EMA direction, structural strength and trend maturity from 5m candles.
     """
 
     if not candles_5m or len(candles_5m) < long_period + 5:
-        return HTFBias("NEUTRAL", 0.5, "NEUTRAL", "Insufficient 5m data")
+        return _neutral(0.5, "Insufficient 5m data")
 
     # Extract close prices
-    prices = [c["close"] for c in candles_5m]
+    prices = list(map(_CLOSE, candles_5m))
 
     ema_short = exponential_moving_average(prices, short_period)
     ema_long = exponential_moving_average(prices, long_period)
 
     if ema_short is None or ema_long is None:
-        return HTFBias("NEUTRAL", 0.5, "NEUTRAL", "EMA unavailable")
-
-    price = prices[-1]
+        return _neutral(0.5, "EMA unavailable")
 
     # ------------------------
     # Direction
@@ -61,7 +95,7 @@ def get_htf_bias(
     elif ema_diff < 0:
         direction = "BEARISH"
     else:
-        return HTFBias("NEUTRAL", 1.0, "NEUTRAL", "Flat EMA")
+        return _neutral(1.0, "Flat EMA")
 
     # ------------------------
     # Strength (structure)
@@ -101,6 +135,26 @@ def get_htf_bias(
                 strength += 1.0
                 comment.append("Trend persistence")
 
+    return HTFStructure(direction, strength, tuple(comment))
+
+
+def apply_vwap_bias(
+    structure: HTFStructure,
+    price: Optional[float],
+    vwap_value: Optional[float] = None,
+    vwap_tolerance: float = 0.006
+) -> HTFBias:
+    """
+    Final HTF bias: structural strength adjusted by price vs VWAP.
+    """
+
+    if structure.neutral is not None:
+        return structure.neutral
+
+    direction = structure.direction
+    strength = structure.strength
+    comment = list(structure.comment)
+
     # ------------------------
     # VWAP influence
     # ------------------------
@@ -131,7 +185,7 @@ def get_htf_bias(
     # ------------------------
     # Clamp strength
     # ------------------------
-    strength = max(0.5, min(round(strength, 2), 10.0))
+    strength = max(0.5, min(strength, 10.0))
 
     # ------------------------
     # Label
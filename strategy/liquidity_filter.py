@@ -24,7 +24,8 @@ class LiquidityContext:
 def analyze_liquidity(
     volume_history: List[float],
     min_avg_volume: int = 400_000,
-    lookback: int = 30
+    lookback: int = 30,
+    avg_vol: Optional[float] = None
 ) -> LiquidityContext:
     """
     Intraday liquidity analysis for MIS / cash segment.
@@ -32,10 +33,13 @@ def analyze_liquidity(
     Interpret liquidity as:
       - HIGH / MEDIUM / LOW / ILLIQUID
     with an associated score in [-2 .. +2].
+
+    avg_vol: average volume of the last `lookback` bars if the caller
+    already keeps it (MarketScanner.avg_volume); computed here otherwise.
     """
 
     # Safety: not enough data
-    if not volume_history or len(volume_history) < lookback:
+    if volume_history is None or len(volume_history) < lookback:
         return LiquidityContext(
             score=-2.0,
             level="ILLIQUID",
@@ -45,7 +49,9 @@ def analyze_liquidity(
         )
 
     recent = volume_history[-lookback:]
-    avg_vol = sum(recent) / lookback
+    if avg_vol is None:
+        # float() each value: float32 arrays would otherwise sum in float32
+        avg_vol = sum(map(float, recent)) / lookback
 
     # -----------------------------
     # 1️⃣ Liquidity Level
@@ -87,7 +93,7 @@ def analyze_liquidity(
     score = max(min(score, 2.0), -2.0)
 
     return LiquidityContext(
-        score=round(score, 2),
+        score=score,
         level=level,
         avg_volume=round(avg_vol),
         consistency=consistency,
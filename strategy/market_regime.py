@@ -3,52 +3,163 @@
 from typing import List, Optional
 from dataclasses import dataclass
 
+import numpy as np
+
+from strategy._njit import njit
+
 
 # =========================
 # Core Calculations
 # =========================
 
-def compute_true_range(highs: List[float], lows: List[float], closes: List[float]) -> List[float]:
-    if len(highs) < 2:
-        return []
-    tr = []
-    for i in range(1, len(highs)):
-        tr.append(
-            max(
-                highs[i] - lows[i],
-                abs(highs[i] - closes[i - 1]),
-                abs(lows[i] - closes[i - 1])
-            )
-        )
-    return tr
+def compute_true_range(highs: List[float], lows: List[float], closes: List[float]) -> np.ndarray:
+    h = np.asarray(highs, dtype=np.float64)
+    if h.shape[0] < 2:
+        return np.empty(0, dtype=np.float64)
+
+    l = np.asarray(lows, dtype=np.float64)
+    c_prev = np.asarray(closes, dtype=np.float64)[:h.shape[0] - 1]
+
+    hl = h[1:] - l[1:]
+    hc = np.abs(h[1:] - c_prev)
+    lc = np.abs(l[1:] - c_prev)
+    return np.maximum(np.maximum(hl, hc), lc)
+
+
+@njit("f8[:](f8[:], i8)", cache=True, nogil=True)
+def _wilder_rma(tr, period):
+    """
+    Wilder's smoothing of the TR series: seeded with the SMA of the first
+    `period` values, then atr[i] = (atr[i-1] * (period - 1) + tr[i]) / period.
+    Entries before period - 1 are NaN.
+    """
+    n = tr.shape[0]
+    atr = np.full(n, np.nan)
+    if n < period:
+        return atr
+
+    seed = 0.0
+    for i in range(period):
+        seed += tr[i]
+    atr[period - 1] = seed / period
+
+    for i in range(period, n):
+        atr[i] = (atr[i - 1] * (period - 1) + tr[i]) / period
+
+    return atr
+
+
+def compute_atr_series(highs: List[float], lows: List[float], closes: List[float], period: int = 14) -> np.ndarray:
+    """
+    Wilder ATR for every bar after the first (aligned with compute_true_range).
+    """
+    return _wilder_rma(compute_true_range(highs, lows, closes), period)
+
+
+def update_atr(prev_atr: float, new_tr: float, period: int = 14) -> float:
+    """
+    One Wilder step: ATR after a new bar with true range new_tr.
+    """
+    return (prev_atr * (period - 1) + new_tr) / period
 
 
 def compute_atr(highs: List[float], lows: List[float], closes: List[float], period: int = 14) -> Optional[float]:
+    """
+    Wilder ATR (RMA of true range) of the last bar.
+    """
     tr = compute_true_range(highs, lows, closes)
     if len(tr) < period:
         return None
-    return sum(tr[-period:]) / period
+    return float(_wilder_rma(tr, period)[-1])
+
+
+@njit("f8(f8[:], f8[:], f8[:], i8)", cache=True, nogil=True)
+def _true_range_at(highs, lows, closes, i):
+    tr = highs[i] - lows[i]
+    hc = abs(highs[i] - closes[i - 1])
+    lc = abs(lows[i] - closes[i - 1])
+    if hc > tr:
+        tr = hc
+    if lc > tr:
+        tr = lc
+    return tr
+
+
+@njit("UniTuple(f8, 2)(f8[:], f8[:], f8[:], i8, i8)", cache=True, nogil=True)
+def _volatility_kernel(highs, lows, closes, period, recent_n):
+    """
+    ATR and normalised volatility for detect_market_regime in one pass:
+    Wilder ATR of the last bar (true range computed on the fly, same
+    recurrence as _wilder_rma), the mean of the last `recent_n` closes
+    and vol_norm = atr / avg_price. atr is NaN with fewer than
+    period + 1 bars.
+    """
+    n = highs.shape[0]
+
+    atr = np.nan
+    if n - 1 >= period:
+        seed = 0.0
+        for i in range(1, period + 1):
+            seed += _true_range_at(highs, lows, closes, i)
+        atr = seed / period
+        for i in range(period + 1, n):
+            atr = (atr * (period - 1) + _true_range_at(highs, lows, closes, i)) / period
+
+    m = closes.shape[0]
+    k = min(recent_n, m)
+    avg_price = 1.0
+    if k > 0:
+        total = 0.0
+        for i in range(m - k, m):
+            total += closes[i]
+        avg_price = total / k
+
+    vol_norm = atr / avg_price if avg_price > 0 else 0.0
+    return atr, vol_norm
+
+
+@njit("UniTuple(f8, 2)(f8[:], f8[:], i8)", cache=True, nogil=True)
+def _adx_loop(h, l, period):
+    """
+    Sums of +DM / -DM over the last `period` bars.
+    """
+    n = h.shape[0]
+    plus_sum = 0.0
+    minus_sum = 0.0
+
+    for i in range(max(1, n - period), n):
+        up = h[i] - h[i - 1]
+        down = l[i - 1] - l[i]
+
+        if up > down and up > 0:
+            plus_sum += up
+        if down > up and down > 0:
+            minus_sum += down
+
+    return plus_sum, minus_sum
 
 
 def compute_adx(highs: List[float], lows: List[float], closes: List[float], period: int = 14) -> Optional[float]:
     if len(highs) < period + 1:
         return None
 
-    plus_dm, minus_dm = [], []
-
-    for i in range(1, len(highs)):
-        up = highs[i] - highs[i - 1]
-        down = lows[i - 1] - lows[i]
+    return _adx_from_atr(
+        np.asarray(highs, dtype=np.float64),
+        np.asarray(lows, dtype=np.float64),
+        compute_atr(highs, lows, closes, period),
+        period
+    )
 
-        plus_dm.append(up if up > down and up > 0 else 0)
-        minus_dm.append(down if down > up and down > 0 else 0)
 
-    atr = compute_atr(highs, lows, closes, period)
+def _adx_from_atr(h: np.ndarray, l: np.ndarray, atr: Optional[float], period: int) -> Optional[float]:
+    # compute_adx with the ATR already known (float64 highs / lows)
     if atr is None or atr == 0:
         return None
 
-    plus_di = (sum(plus_dm[-period:]) / atr) * 100
-    minus_di = (sum(minus_dm[-period:]) / atr) * 100
+    plus_sum, minus_sum = _adx_loop(h, l, period)
+
+    plus_di = (float(plus_sum) / atr) * 100
+    minus_di = (float(minus_sum) / atr) * 100
 
     if plus_di + minus_di == 0:
         return 0.0
@@ -95,8 +206,16 @@ def detect_market_regime(
             comment="insufficient_data"
         )
 
-    adx = compute_adx(highs, lows, closes)
-    atr = compute_atr(highs, lows, closes)
+    h = np.asarray(highs, dtype=np.float64)
+    l = np.asarray(lows, dtype=np.float64)
+
+    # ATR and ATR / avg price of the last 10 closes in one kernel pass;
+    # the ADX reuses that ATR
+    atr, vol_norm = _volatility_kernel(h, l, np.asarray(closes, dtype=np.float64), 14, 10)
+    atr = None if np.isnan(atr) else float(atr)
+    vol_norm = float(vol_norm)
+
+    adx = _adx_from_atr(h, l, atr, 14)
 
     if adx is None or atr is None:
         return MarketRegime(
@@ -107,23 +226,16 @@ def detect_market_regime(
             comment="indicators_unavailable"
         )
 
-    # ---------------------
-    # Volatility Normalization
-    # ---------------------
-
-    recent_n = min(10, len(closes))
-    avg_price = sum(closes[-recent_n:]) / recent_n if recent_n > 0 else 1.0
-    vol_norm = atr / avg_price if avg_price > 0 else 0.0
-
     # ---------------------
     # Range Comparison
     # ---------------------
 
-    recent_range = max(highs[-10:]) - min(lows[-10:])
+    # float(): lists or float64 arrays (StrategyEngine) give the same result
+    recent_range = float(max(highs[-10:]) - min(lows[-10:]))
     prev_highs = highs[-20:-10] if len(highs) >= 20 else highs[:len(highs)//2]
     prev_lows = lows[-20:-10] if len(lows) >= 20 else lows[:len(lows)//2]
 
-    prev_range = (max(prev_highs) - min(prev_lows)) if prev_highs and prev_lows else 0.0
+    prev_range = float(max(prev_highs) - min(prev_lows)) if len(prev_highs) and len(prev_lows) else 0.0
 
     if prev_range <= 0:
         prev_range = max(recent_range * 0.8, 1e-9)
@@ -5,13 +5,16 @@ MTFBuilder — build higher-timeframe candles from 1-minute bars.
 Design goals:
 - No extra API calls (aggregate 1m bars you already have).
 - Low latency: aggregates the last N 1-minute bars immediately.
-- Memory-safe: uses deque with configurable maxlen.
-- Simple, deterministic API: update(...) + get_latest_tf(...) / get_tf_history(...).
+- Memory-safe: fixed-size ring buffer per instrument (configurable length).
+- Simple, deterministic API: update(...) + get_latest_tf(...) / get_tf_history(...)
+  / get_tf_history_arrays(...).
 """
 
-from collections import defaultdict, deque
+from collections import defaultdict
 from datetime import datetime
-from typing import Deque, Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
 
 ISOFMT = "%Y-%m-%dT%H:%M:%S"
 
@@ -29,6 +32,59 @@ def _to_minute_iso(ts: Union[str, datetime]) -> str:
     return dt.strftime(ISOFMT)
 
 
+# row order of _MinuteRing.ohlcv
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+class _MinuteRing:
+    """
+    1-minute bars of one instrument as a struct of arrays: a (5, max_len)
+    float64 OHLCV ring (one contiguous row per field) plus bar times in a
+    parallel list. `head` counts every bar ever appended; the write slot
+    is head % max_len.
+    """
+
+    __slots__ = ("max_len", "ohlcv", "times", "head")
+
+    def __init__(self, max_len: int):
+        self.max_len = max_len
+        self.ohlcv = np.empty((5, max_len), dtype=np.float64)
+        self.times: List[Optional[str]] = [None] * max_len
+        self.head = 0
+
+    def __len__(self) -> int:
+        return min(self.head, self.max_len)
+
+    @property
+    def last_time(self) -> Optional[str]:
+        return self.times[(self.head - 1) % self.max_len] if self.head else None
+
+    def append(self, time_iso: str, o: float, h: float, l: float, c: float, v: float):
+        i = self.head % self.max_len
+        self.ohlcv[:, i] = (o, h, l, c, v)
+        self.times[i] = time_iso
+        self.head += 1
+
+    def replace_last(self, o: float, h: float, l: float, c: float, v: float):
+        self.ohlcv[:, (self.head - 1) % self.max_len] = (o, h, l, c, v)
+
+    def tail(self, n: int) -> Tuple[np.ndarray, List[str]]:
+        """
+        (5, n) OHLCV block and times of the last n bars (oldest -> newest).
+        The block is a view into the ring unless the window wraps.
+        """
+        end = self.head % self.max_len
+        if end == 0 and self.head:
+            end = self.max_len
+        start = end - n
+        if start >= 0:
+            return self.ohlcv[:, start:end], self.times[start:end]
+        return (
+            np.concatenate((self.ohlcv[:, start:], self.ohlcv[:, :end]), axis=1),
+            self.times[start:] + self.times[:end]
+        )
+
+
 class MTFBuilder:
     """
     Builds higher timeframe candles (N-minute) from 1-minute bars.
@@ -37,47 +93,84 @@ class MTFBuilder:
       - Call update(inst_key, timestamp, o,h,l,c,v) for each 1-minute bar (or register a callback on bar close).
       - Use get_latest_tf(inst_key, minutes=5) to get aggregated candle for last `minutes` 1-minute bars.
       - Use get_tf_history(inst_key, minutes=5, lookback=3) to get last 3 aggregated 5-min candles (oldest->newest).
+      - Use get_tf_history_arrays(inst_key, minutes=5, lookback=150) for the same candles as
+        (highs, lows, closes, volumes) float64 arrays, without building dicts.
     """
 
     def __init__(self, max_1m_bars: int = 2000):
-        # store recent 1-minute bars per instrument
-        # each element is dict: {"time": "YYYY-MM-DDTHH:MM:SS", "open":, "high":, "low":, "close":, "volume":}
+        # recent 1-minute bars per instrument (see _MinuteRing)
         self.max_1m_bars = max_1m_bars
-        self.buffers: Dict[str, Deque[dict]] = defaultdict(lambda: deque(maxlen=self.max_1m_bars))
-
-    def update(self, inst_key: str, timestamp: Union[str, datetime], o: float, h: float, l: float, c: float, v: float):
+        self.buffers: Dict[str, _MinuteRing] = defaultdict(lambda: _MinuteRing(self.max_1m_bars))
+
+    def update(
+        self,
+        inst_key: str,
+        timestamp: Union[str, datetime],
+        o: float,
+        h: float,
+        l: float,
+        c: float,
+        v: float
+    ):
         """
         Add a 1-minute bar. timestamp may be ISO string or datetime.
         We normalize to minute boundary automatically.
+
+        A bar for the same minute as the newest one replaces it (an
+        in-progress bar updated tick by tick), so each minute is held once.
         """
         t_iso = _to_minute_iso(timestamp)
-        bar = {"time": t_iso, "open": o, "high": h, "low": l, "close": c, "volume": v}
-        self.buffers[inst_key].append(bar)
+        ring = self.buffers[inst_key]
+
+        if ring.last_time == t_iso:
+            ring.replace_last(o, h, l, c, v)
+        else:
+            ring.append(t_iso, o, h, l, c, v)
 
-    def _aggregate(self, bars: List[dict]) -> dict:
+    def bar_count(self, inst_key: str) -> int:
+        """Number of 1-minute bars held for inst_key."""
+        ring = self.buffers.get(inst_key)
+        return len(ring) if ring is not None else 0
+
+    def _blocks(self, inst_key: str, minutes: int, lookback: int):
         """
-        Aggregate a list of 1-minute bar dicts (oldest->newest) into one N-minute candle.
+        Aggregate the newest `lookback` contiguous blocks of `minutes` bars
+        (fewer if there isn't enough data). Returns (times, agg) with agg a
+        (5, k) OHLCV array of the k candles (oldest -> newest) and times
+        the bar times of the underlying 1-minute bars, or None if k == 0.
         """
-        return {
-            "time_start": bars[0]["time"],
-            "time_end": bars[-1]["time"],
-            "open": bars[0]["open"],
-            "high": max(b["high"] for b in bars),
-            "low": min(b["low"] for b in bars),
-            "close": bars[-1]["close"],
-            "volume": sum(b.get("volume", 0) for b in bars)
-        }
+        ring = self.buffers.get(inst_key)
+        if ring is None:
+            return None
+
+        k = min(lookback, len(ring) // minutes)
+        if k <= 0:
+            return None
+
+        block, times = ring.tail(k * minutes)
+        block = block.reshape(5, k, minutes)
+
+        # volume summed bar by bar, in time order
+        volume = block[VOLUME, :, 0].copy()
+        for j in range(1, minutes):
+            volume += block[VOLUME, :, j]
+
+        agg = np.stack((
+            block[OPEN, :, 0],
+            block[HIGH].max(axis=1),
+            block[LOW].min(axis=1),
+            block[CLOSE, :, -1],
+            volume
+        ))
+        return times, agg
 
     def get_latest_tf(self, inst_key: str, minutes: int = 5) -> Optional[dict]:
         """
         Return aggregated candle of the last `minutes` 1-minute bars (oldest->newest inside).
         If not enough bars, returns None.
         """
-        bars = self.buffers.get(inst_key)
-        if not bars or len(bars) < minutes:
-            return None
-        chunk = list(bars)[-minutes:]
-        return self._aggregate(chunk)
+        history = self.get_tf_history(inst_key, minutes=minutes, lookback=1)
+        return history[0] if history else None
 
     def get_tf_history(self, inst_key: str, minutes: int = 5, lookback: int = 3) -> List[dict]:
         """
@@ -86,23 +179,43 @@ class MTFBuilder:
         Each aggregated candle uses contiguous blocks of `minutes` 1-minute bars.
         If there isn't enough data to fill all lookback candles, returns as many as possible.
         """
-        out: List[dict] = []
-        bars = self.buffers.get(inst_key)
-        if not bars:
-            return out
-
-        bar_list = list(bars)
-        total = len(bar_list)
-        # compute aggregated windows from the tail
-        for i in range(lookback, 0, -1):
-            end = total - (i - 1) * minutes
-            start = end - minutes
-            if start < 0:
-                continue
-            chunk = bar_list[start:end]
-            out.append(self._aggregate(chunk))
-
-        return out
+        blocks = self._blocks(inst_key, minutes, lookback)
+        if blocks is None:
+            return []
+
+        times, agg = blocks
+        opens, highs, lows, closes, volumes = agg.tolist()
+
+        return [
+            {
+                "time_start": times[i * minutes],
+                "time_end": times[(i + 1) * minutes - 1],
+                "open": opens[i],
+                "high": highs[i],
+                "low": lows[i],
+                "close": closes[i],
+                "volume": volumes[i]
+            }
+            for i in range(len(opens))
+        ]
+
+    def get_tf_history_arrays(
+        self,
+        inst_key: str,
+        minutes: int = 5,
+        lookback: int = 3
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The candles of get_tf_history as (highs, lows, closes, volumes)
+        float64 arrays (empty arrays when there is no full candle yet).
+        """
+        blocks = self._blocks(inst_key, minutes, lookback)
+        if blocks is None:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty, empty, empty
+
+        agg = blocks[1]
+        return agg[HIGH], agg[LOW], agg[CLOSE], agg[VOLUME]
 
     # convenience helpers
     def get_latest_5m(self, inst_key: str) -> Optional[dict]:
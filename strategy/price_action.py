@@ -5,6 +5,7 @@ Price action helpers for intraday use.
 Functions:
 - detect_pullback_in_trend(...)  -> identifies small pullbacks inside a trend (PULLBACK_UP / PULLBACK_DOWN / None)
 - rejection_info(...)            -> detects rejection wicks and returns a score 0..1
+- rejection_info_batch(...)      -> rejection_info over whole OHLC arrays (replay / backtest)
 - price_action_context(...)      -> combined context used by decision_engine:
                                    { pullback: str|None,
                                      pullback_depth: float,
@@ -15,7 +16,9 @@ Functions:
 Design: conservative, additive (soft), and safe for intraday.
 """
 
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
+
+import numpy as np
 
 
 def _safe_last(seq: List[float], idx: int = -1) -> Optional[float]:
@@ -44,12 +47,12 @@ def detect_pullback_in_trend(
         "depth": float (0..1) }
     or None if not enough data.
     """
-    if not prices or len(prices) < lookback + 1:
+    if prices is None or len(prices) < lookback + 1:
         return None
 
     last = prices[-1]
     window = prices[-(lookback + 1):-1]  # exclude last bar when computing recent swing
-    if not window:
+    if len(window) == 0:
         return None
 
     recent_high = max(window)
@@ -99,11 +102,22 @@ def rejection_info(open_p: float, high: float, low: float, close: float) -> Dict
       - If one wick >> body, it's a rejection in opposite direction of the wick.
       - Score is normalized to 0..1.
     """
-    body = abs(close - open_p)
-    total_range = max(high - low, 1e-9)
-
-    upper_wick = max(0.0, high - max(close, open_p))
-    lower_wick = max(0.0, min(close, open_p) - low)
+    if close > open_p:
+        body_hi, body_lo = close, open_p
+    else:
+        body_hi, body_lo = open_p, close
+
+    body = body_hi - body_lo
+    total_range = high - low
+    if total_range < 1e-9:
+        total_range = 1e-9
+
+    upper_wick = high - body_hi
+    if upper_wick < 0.0:
+        upper_wick = 0.0
+    lower_wick = body_lo - low
+    if lower_wick < 0.0:
+        lower_wick = 0.0
 
     # normalized measures (0..1)
     upper_rel = upper_wick / total_range
@@ -130,14 +144,54 @@ def rejection_info(open_p: float, high: float, low: float, close: float) -> Dict
 
     return {
         "rejection_type": rejection_type,
-        "rejection_score": round(rejection_score, 3),
-        "upper_wick": round(upper_wick, 6),
-        "lower_wick": round(lower_wick, 6),
-        "body": round(body, 6),
-        "range": round(total_range, 6)
+        "rejection_score": rejection_score,
+        "upper_wick": upper_wick,
+        "lower_wick": lower_wick,
+        "body": body,
+        "range": total_range
     }
 
 
+def rejection_info_batch(opens, highs, lows, closes) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    rejection_info for every bar of OHLC arrays in one vectorized pass
+    (replays / backtests over long series).
+
+    Returns (types, scores):
+      types  int8: 1 = BULLISH, -1 = BEARISH, 0 = none
+      scores float64 rejection_score per bar (0.0 where types == 0)
+    Same thresholds and precedence as rejection_info, bar for bar.
+    """
+    o = np.asarray(opens, dtype=np.float64)
+    h = np.asarray(highs, dtype=np.float64)
+    l = np.asarray(lows, dtype=np.float64)
+    c = np.asarray(closes, dtype=np.float64)
+
+    body_hi = np.maximum(c, o)
+    body_lo = np.minimum(c, o)
+    total_range = np.maximum(h - l, 1e-9)
+
+    upper_rel = np.maximum(h - body_hi, 0.0) / total_range
+    lower_rel = np.maximum(body_lo - l, 0.0) / total_range
+    body_rel = (body_hi - body_lo) / total_range
+
+    # bullish wins when both qualify (the scalar version checks it first)
+    bull = (lower_rel > body_rel * 1.5) & (lower_rel > 0.12)
+    bear = ~bull & (upper_rel > body_rel * 1.5) & (upper_rel > 0.12)
+
+    wick_rel = np.where(bull, lower_rel, upper_rel)
+    scores = np.where(bull | bear, np.minimum(1.0, (wick_rel - 0.12) / 0.6), 0.0)
+
+    types = bull.astype(np.int8) - bear.astype(np.int8)
+
+    # small noise guard
+    noise = scores < 0.05
+    scores[noise] = 0.0
+    types[noise] = 0
+
+    return types, scores
+
+
 def price_action_context(
     prices: List[float],
     highs: List[float],
@@ -173,7 +227,7 @@ def price_action_context(
     }
 
     # Basic safety
-    if not prices or not highs or not lows or not closes or len(prices) < 6:
+    if not (len(prices) and len(highs) and len(lows) and len(closes)) or len(prices) < 6:
         result["comment"] = "insufficient data"
         return result
 
@@ -207,10 +261,10 @@ def price_action_context(
     # Rejection: bullish rejection supports LONG, bearish supports SHORT
     if rej["rejection_type"] == "BULLISH":
         score += 0.4 * rej["rejection_score"]
-        comments.append(f"bullish_rejection+{rej['rejection_score']}")
+        comments.append(f"bullish_rejection+{rej['rejection_score']:.3f}")
     elif rej["rejection_type"] == "BEARISH":
         score -= 0.4 * rej["rejection_score"]
-        comments.append(f"bearish_rejection-{rej['rejection_score']}")
+        comments.append(f"bearish_rejection-{rej['rejection_score']:.3f}")
 
     # EMA trend consistency: if EMA provided and matches pullback / rejection, boost slightly
     if ema_short is not None and ema_long is not None:
@@ -237,7 +291,7 @@ def price_action_context(
     if score < -1.0:
         score = -1.0
 
-    result["score"] = round(score, 3)
+    result["score"] = score
     result["comment"] = " | ".join(comments) if comments else "no_pa"
     return result
     
@@ -1,10 +1,63 @@
 # strategy/pullback_detector.py
 
 from typing import Optional, Dict, List
-from strategy.sr_levels import compute_sr_levels, get_nearest_sr
-from strategy.volume_filter import analyze_volume
-from strategy.volatility_filter import compute_atr, analyze_volatility
-from strategy.price_action import rejection_info
+
+import numpy as np
+
+from strategy.sr_levels import compute_sr_levels, level_arrays
+from strategy.volume_filter import VolumeContext, _VOLUME_INSUFFICIENT
+from strategy.signal_context import SignalContext
+from strategy._pullback_njit import (
+    _pullback_core,
+    SIDE_SUPPORT,
+    VOLAT_EXPANDING,
+)
+
+# AOT-compiled kernel (python build_aot.py), if built; else the JIT one
+try:
+    from strategy._pullback_aot import pullback_core as _pullback_core
+except ImportError:
+    pass
+
+
+_HTF_CODES = {"BULLISH": 1, "BEARISH": -1}
+_DIRECTIONS = {1: "LONG", -1: "SHORT"}
+_REJECTIONS = {1: "BULLISH", -1: "BEARISH", 0: None}
+_VOLAT_STATES = ("UNKNOWN", "CONTRACTING", "BUILDING", "EXPANDING", "EXHAUSTION")
+_VOLUME_STRENGTHS = ("NONE", "WEAK", "MODERATE", "STRONG")
+_VOLUME_TRENDS = {1: "RISING", -1: "FALLING", 0: "FLAT"}
+
+# analyze_volume defaults mirrored by the kernel
+_VOLUME_LOOKBACK = 20
+_VOLUME_RISING_BARS = 4
+
+
+def _volume_context(volumes, closes, score: float, strength: str, trend_code: int) -> VolumeContext:
+    """
+    analyze_volume(volumes, close_prices=closes) rebuilt from the kernel's
+    volume score / trend (same thresholds, so the same context).
+    """
+    if len(volumes) < _VOLUME_LOOKBACK + _VOLUME_RISING_BARS:
+        return _VOLUME_INSUFFICIENT
+
+    if len(closes) >= _VOLUME_RISING_BARS:
+        price_move = closes[-1] - closes[-_VOLUME_RISING_BARS]
+        if abs(price_move) < 0.002 * closes[-1]:
+            if strength in ("STRONG", "MODERATE"):
+                comment = "absorption suspicion"
+            else:
+                comment = "volume, no price move"
+        else:
+            comment = "volume supports price move"
+    else:
+        comment = "volume only"
+
+    return VolumeContext(
+        score=round(score, 2),
+        strength=strength,
+        trend=_VOLUME_TRENDS[trend_code],
+        comment=comment
+    )
 
 
 def detect_pullback_signal(
@@ -15,7 +68,19 @@ def detect_pullback_signal(
     volumes: List[float],
     htf_direction: str,
     max_proximity: float = 0.018,
-    min_bars: int = 35
+    min_bars: int = 35,
+    sr_levels: Optional[Dict] = None,
+    atr_value: Optional[float] = None,
+    signal_ctx: Optional[SignalContext] = None,
+    *,
+    # hot-path globals bound as locals (not part of the API)
+    _core=_pullback_core,
+    _sr=compute_sr_levels,
+    _level_arrays=level_arrays,
+    _asarray=np.asarray,
+    _f64=np.float64,
+    _min=min,
+    _max=max
 ) -> Optional[Dict]:
     """
     PROFESSIONAL PULLBACK DETECTOR
@@ -28,135 +93,85 @@ def detect_pullback_signal(
     CORE LOGIC:
     LONG  -> price NEAR SUPPORT with confirmation
     SHORT -> price NEAR RESISTANCE with confirmation
+
+    Steps (run in _pullback_njit._pullback_core):
+    1) structural location (nearest SR)
+    2) extension filter (avoid chasing)
+    3) volatility quality check
+    4) price action confirmation
+    5) volume confirmation
+    6) momentum filter
+    7) confidence scoring
+
+    sr_levels / atr_value may be passed in when the caller already
+    computed them for the current bar (see StrategyEngine); otherwise
+    they are computed here.
+
+    If a SignalContext is given and a signal is returned, the ATR and
+    VolumeContext measured here are stored on it (atr / vol_ctx), so
+    final_trade_decision(signal_ctx=...) does not compute them again.
+
+    The trailing underscore keyword arguments only pre-bind module globals
+    and builtins as fast locals; never pass them.
     """
 
     if len(prices) < min_bars:
         return None
 
-    last_price = closes[-1]
-
-    # --------------------------------------------------
-    # 1) STRUCTURAL LOCATION (WHERE ARE WE?)
-    # --------------------------------------------------
-
-    sr = compute_sr_levels(highs, lows)
-    nearest = get_nearest_sr(last_price, sr, max_search_pct=max_proximity)
-
-    if not nearest:
-        return None
-
-    # Direction intent from SR
-    trade_direction = None
-
-    if nearest["type"] == "support" and htf_direction == "BULLISH":
-        trade_direction = "LONG"
-
-    elif nearest["type"] == "resistance" and htf_direction == "BEARISH":
-        trade_direction = "SHORT"
-
-    else:
-        return None
-
-    # --------------------------------------------------
-    # 2) EXTENSION FILTER (AVOID CHASING)
-    # --------------------------------------------------
-
-    recent_move = abs(closes[-1] - closes[-6])
-
-    atr = compute_atr(highs, lows, closes)
-
-    if atr and recent_move > atr * 1.6:
-        return None  # too extended
-
-    # --------------------------------------------------
-    # 3) VOLATILITY QUALITY CHECK
-    # --------------------------------------------------
-
-    volat_ctx = analyze_volatility(
-        current_move=closes[-1] - closes[-2],
-        atr_value=atr
+    sr = sr_levels if sr_levels is not None else _sr(highs, lows)
+    supports = sr.get("supports", [])
+    resistances = sr.get("resistances", [])
+    sup_levels, res_levels = _level_arrays(sr)
+
+    (
+        direction_code, total_score, sr_side, sr_idx, sr_dist,
+        price_reaction, volume_ok, volat_state, momentum_ok,
+        volume_strength, rejection, atr, volume_score, volume_trend
+    ) = _core(
+        _asarray(highs, dtype=_f64),
+        _asarray(lows, dtype=_f64),
+        _asarray(closes, dtype=_f64),
+        _asarray(volumes, dtype=_f64),
+        sup_levels,
+        res_levels,
+        _HTF_CODES.get(htf_direction, 0),
+        max_proximity,
+        np.nan if atr_value is None else atr_value
     )
 
-    if volat_ctx.state in ["CONTRACTING", "EXHAUSTION"]:
+    if direction_code == 0:
         return None
 
-    # --------------------------------------------------
-    # 4) PRICE ACTION CONFIRMATION
-    # --------------------------------------------------
-
-    last_bar_rejection = rejection_info(
-        closes[-2], highs[-1], lows[-1], closes[-1]
-    )
-
-    price_reaction = False
-
-    if trade_direction == "LONG" and last_bar_rejection["rejection_type"] == "BULLISH":
-        price_reaction = True
-
-    if trade_direction == "SHORT" and last_bar_rejection["rejection_type"] == "BEARISH":
-        price_reaction = True
-
-    # Basic directional reaction
-    if trade_direction == "LONG" and closes[-1] > closes[-3]:
-        price_reaction = True
-
-    if trade_direction == "SHORT" and closes[-1] < closes[-3]:
-        price_reaction = True
-
-    # --------------------------------------------------
-    # 5) VOLUME CONFIRMATION
-    # --------------------------------------------------
-
-    vol_ctx = analyze_volume(volumes, close_prices=closes)
-
-    volume_ok = vol_ctx.score >= 0.6
+    trade_direction = _DIRECTIONS[direction_code]
 
-    # --------------------------------------------------
-    # 6) MOMENTUM FILTER (DON’T BUY WEAK)
-    # --------------------------------------------------
-
-    short_term_trend = closes[-1] - closes[-5]
-
-    momentum_ok = False
-
-    if trade_direction == "LONG" and short_term_trend > 0:
-        momentum_ok = True
-
-    if trade_direction == "SHORT" and short_term_trend < 0:
-        momentum_ok = True
+    if sr_side == SIDE_SUPPORT:
+        level = supports[sr_idx]
+        sr_type = "support"
+    else:
+        level = resistances[sr_idx]
+        sr_type = "resistance"
+
+    nearest = {
+        "type": sr_type,
+        "level": level["level"],
+        "dist_pct": sr_dist,
+        "strength": level.get("strength", 1)
+    }
 
     # --------------------------------------------------
-    # 7) CONFIDENCE SCORING SYSTEM
+    # CONFIDENCE COMPONENTS
     # --------------------------------------------------
 
     components = {
-        "location": 0.0,
-        "price_action": 0.0,
-        "volume": 0.0,
-        "volatility": 0.0,
-        "momentum": 0.0
+        "location": _min(_max(0.0, (max_proximity - sr_dist) * 60), 2.0),
+        "price_action": 2.0 if price_reaction else 0.0,
+        "volume": 1.5 if volume_ok else 0.0,
+        "volatility": 1.2 if volat_state == VOLAT_EXPANDING else 0.0,
+        "momentum": 1.3 if momentum_ok else 0.0
     }
 
-    # Location quality
-    proximity_score = max(0, (max_proximity - nearest["dist_pct"]) * 60)
-    components["location"] = min(proximity_score, 2.0)
-
-    if price_reaction:
-        components["price_action"] = 2.0
-
-    if volume_ok:
-        components["volume"] = 1.5
-
-    if volat_ctx.state == "EXPANDING":
-        components["volatility"] = 1.2
-
-    if momentum_ok:
-        components["momentum"] = 1.3
-
-    total_score = sum(components.values())
-
     # --------------------------------------------------
-    # 8) CLASSIFICATION
+    # CLASSIFICATION
     # --------------------------------------------------
 
     if total_score >= 5.0:
@@ -166,6 +181,15 @@ def detect_pullback_signal(
     else:
         return None
 
+    atr = atr if atr == atr else None
+
+    if signal_ctx is not None:
+        signal_ctx.atr = atr
+        signal_ctx.vol_ctx = _volume_context(
+            volumes, closes, volume_score,
+            _VOLUME_STRENGTHS[volume_strength], volume_trend
+        )
+
     return {
         "signal": signal,
         "direction": trade_direction,
@@ -173,9 +197,11 @@ def detect_pullback_signal(
         "nearest_level": nearest,
         "components": components,
         "context": {
-            "volatility": volat_ctx.state,
-            "volume": vol_ctx.strength,
-            "rejection": last_bar_rejection["rejection_type"]
+            "volatility": _VOLAT_STATES[volat_state],
+            "volume": _VOLUME_STRENGTHS[volume_strength],
+            "rejection": _REJECTIONS[rejection]
         },
-        "reason": f"{signal}_{trade_direction}"
+        "reason": f"{signal}_{trade_direction}",
+        # ATR the gates above used; reused by final_trade_decision
+        "atr": atr
     }
@@ -1,30 +1,223 @@
 # strategy/scanner.py
 """
 Hardened MarketScanner (production-ready).
-- keeps rolling 1-minute OHLCV bars per instrument (dict-of-deques)
+- keeps rolling 1-minute OHLCV bars per instrument (NumPy ring buffers)
 - supports tick aggregation, direct OHLC bar ingestion (append_ohlc_bar)
-- snapshot persistence and resume
+- snapshot persistence and resume (binary .npz bars + JSON sidecar)
 - on_bar_close callbacks so MTF/strategy can run immediately when a bar closes
 - alert throttling helpers (last_alert_time, dedupe)
 - basic health checks and replay utilities
-- thread-safe for use from websocket threads
+- thread-safe for use from websocket threads (lock-free reads)
 """
 
 import json
 import os
 import threading
 import time
-from collections import deque, defaultdict
+import zipfile
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Callable, Optional
+from typing import Dict, List, Callable, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from strategy.sr_levels import compute_sr_levels
 
 DEFAULT_MAX_LEN = 600  # keep 600 1-minute bars (~10 hours)
+VOLUME_WINDOW = 30     # bars in the running volume sum (liquidity lookback)
+
+ISOFMT = "%Y-%m-%dT%H:%M:%S"  # simple ISO without tz, in exchange time
+
+# NSE wall clock; bar times are stamped in it whatever the host's zone is
+EXCHANGE_TZ = ZoneInfo("Asia/Kolkata")
 
-ISOFMT = "%Y-%m-%dT%H:%M:%S"  # simple ISO without tz
+# column layout of the per-instrument OHLCV buffer
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+BAR_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def exchange_now() -> datetime:
+    """Current exchange time, naive like the bar timestamps."""
+    return datetime.now(EXCHANGE_TZ).replace(tzinfo=None)
 
 
 def _now_iso():
-    return datetime.now().strftime(ISOFMT)
+    return exchange_now().strftime(ISOFMT)
+
+
+class _BarRing:
+    """
+    Fixed-size ring buffer of 1-minute bars for one instrument.
+
+    OHLCV values live in a (5, max_len) float32 array - one contiguous row
+    per field (struct of arrays), so column getters are plain contiguous
+    views - bar times in a parallel list. float32 halves the per-instrument footprint; consumers
+    promote to float64 where they accumulate.
+
+    `head` counts every bar ever appended; the write slot is
+    head % max_len.
+
+    vol_sum is a running sum of the last vol_window volumes, kept in step
+    with append() / update_last() so the average volume is O(1).
+
+    `seq` is a sequence counter (seqlock): writers make it odd while they
+    modify the ring and even again when done. Readers never lock; read()
+    runs a copying reader and retries it if a write overlapped. Writes
+    must be serialised by the caller holding `lock` (one per instrument,
+    so writers of different instruments never wait on each other).
+
+    bars_received / bars_closed count tick and closed-bar writes; they
+    are only changed under `lock`.
+    """
+
+    __slots__ = (
+        "max_len", "ohlcv", "times", "head", "vol_window", "vol_sum", "seq",
+        "lock", "bars_received", "bars_closed"
+    )
+
+    def __init__(self, max_len: int, vol_window: int = VOLUME_WINDOW):
+        self.max_len = max_len
+        self.ohlcv = np.empty((5, max_len), dtype=np.float32)
+        self.times: List[Optional[str]] = [None] * max_len
+        self.head = 0
+        self.vol_window = min(vol_window, max_len)
+        self.vol_sum = 0.0
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.bars_received = 0
+        self.bars_closed = 0
+
+    def __len__(self) -> int:
+        return min(self.head, self.max_len)
+
+    @property
+    def last(self) -> int:
+        """Slot index of the newest bar."""
+        return (self.head - 1) % self.max_len
+
+    def read(self, reader: Callable):
+        """
+        Run reader() (which must copy what it reads) until no write
+        overlapped it, and return its result.
+        """
+        while True:
+            seq = self.seq
+            if seq & 1:
+                time.sleep(0)  # writer mid-update: let it finish
+                continue
+            out = reader()
+            if self.seq == seq:
+                return out
+
+    def append(self, time_iso: str, open_p: float, high_p: float, low_p: float, close_p: float, volume: float):
+        self.seq += 1
+
+        if self.head >= self.vol_window:
+            # bar leaving the volume window (read before it may be overwritten)
+            self.vol_sum -= float(self.ohlcv[VOLUME, (self.head - self.vol_window) % self.max_len])
+
+        i = self.head % self.max_len
+        self.ohlcv[:, i] = (open_p, high_p, low_p, close_p, volume)
+        self.times[i] = time_iso
+        self.head += 1
+
+        self.vol_sum += float(self.ohlcv[VOLUME, i])
+
+        self.seq += 1
+
+    def update_last(self, price: float, volume: float):
+        """Fold a tick into the newest bar (in-progress bar from ticks)."""
+        self.seq += 1
+
+        row = self.ohlcv[:, self.last]  # view: writes go to the ring
+        if price > row[HIGH]:
+            row[HIGH] = price
+        if price < row[LOW]:
+            row[LOW] = price
+        row[CLOSE] = price
+
+        old = float(row[VOLUME])
+        row[VOLUME] += volume
+        self.vol_sum += float(row[VOLUME]) - old
+
+        self.seq += 1
+
+    def avg_volume(self) -> Optional[float]:
+        count = min(self.head, self.vol_window)
+        return self.vol_sum / count if count else None
+
+    def _tail_bounds(self, n: Optional[int]):
+        """
+        Slot range [start, end) of the last n bars. start < 0 means the
+        window wraps: slots start % max_len .. max_len, then 0 .. end.
+        """
+        count = len(self)
+        n = count if n is None else max(0, min(n, count))
+        end = self.head % self.max_len
+        if end == 0 and self.head:
+            end = self.max_len
+        return end - n, end
+
+    def _tail_slice(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        (5, n) OHLCV block of the last n bars (oldest -> newest).
+        A view into the ring unless the window wraps (then one concatenate).
+        """
+        start, end = self._tail_bounds(n)
+        if start >= 0:
+            return self.ohlcv[:, start:end]
+        return np.concatenate((self.ohlcv[:, start:], self.ohlcv[:, :end]), axis=1)
+
+    def tail_times(self, n: Optional[int] = None) -> List[str]:
+        start, end = self._tail_bounds(n)
+        if start >= 0:
+            return self.times[start:end]
+        return self.times[start:] + self.times[:end]
+
+    def column(self, col: int, n: Optional[int] = None) -> np.ndarray:
+        """
+        Last n values of one column (oldest -> newest), as a new array.
+        """
+        start, end = self._tail_bounds(n)
+        if start >= 0:
+            return self.ohlcv[col, start:end].copy()
+        return np.concatenate((self.ohlcv[col, start:], self.ohlcv[col, :end]))
+
+    def hlcv(self, dtype=np.float32) -> np.ndarray:
+        """
+        (4, n) high / low / close / volume rows of all bars (oldest ->
+        newest) as one new array of `dtype`.
+        """
+        return self._tail_slice()[HIGH:].astype(dtype)
+
+    def export(self):
+        """All bars oldest -> newest as ((5, n) OHLCV copy, times list)."""
+        return self._tail_slice().copy(), self.tail_times()
+
+    @classmethod
+    def from_arrays(cls, max_len: int, ohlcv: np.ndarray, times: List[str]) -> "_BarRing":
+        """Ring holding the last max_len bars of an export() result."""
+        ring = cls(max_len)
+        n = min(len(times), max_len)
+        if n:
+            ring.ohlcv[:, :n] = ohlcv[:, -n:]
+            ring.times[:n] = times[-n:]
+            ring.head = n
+            start = max(0, n - ring.vol_window)
+            ring.vol_sum = float(ring.ohlcv[VOLUME, start:n].sum(dtype=np.float64))
+        return ring
+
+    def bar(self, i: int) -> dict:
+        o, h, l, c, v = self.ohlcv[:, i].tolist()
+        return {"time": self.times[i], "open": o, "high": h, "low": l, "close": c, "volume": v}
+
+    def bars(self, n: Optional[int] = None) -> List[dict]:
+        o, h, l, c, v = self._tail_slice(n).tolist()
+        return [
+            {"time": t, "open": o[k], "high": h[k], "low": l[k], "close": c[k], "volume": v[k]}
+            for k, t in enumerate(self.tail_times(n))
+        ]
 
 
 class MarketScanner:
@@ -32,42 +225,57 @@ class MarketScanner:
         self.max_len = max_len
         self.snapshot_path = snapshot_path
 
-        # core storage: per-symbol deque of bar dicts
-        # bar dict: {"time": "YYYY-MM-DDTHH:MM:SS", "open":, "high":, "low":, "close":, "volume":}
-        self._bars: Dict[str, deque] = {}
-        self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        # core storage: per-symbol ring buffer of OHLCV bars
+        # bar dict (as returned by getters): {"time": "YYYY-MM-DDTHH:MM:SS", "open":, "high":, "low":, "close":, "volume":}
+        self._rings: Dict[str, _BarRing] = {}
+        # guards instrument insertion and snapshot save / load; writes to a
+        # ring take that ring's own lock, readers go lock-free through its
+        # sequence counter (_BarRing.read)
         self._global_lock = threading.Lock()
 
-        # quick-access caches (kept in sync) to preserve compatibility with your old getters
-        # These will be derived from self._bars on request to avoid duplication.
         # last_alert_time and dedupe state
         self.last_alert_time: Dict[str, float] = {}
         self._dedupe_map: Dict[str, Dict[str, float]] = defaultdict(dict)  # inst -> {direction: ts}
         self._paused_until: Dict[str, float] = {}  # inst -> timestamp (epoch) until which instrument is paused
 
+        # inst -> (bar time, lookback, SR levels of the 1m bars); see get_sr
+        self._sr_cache: Dict[str, Tuple[Optional[str], int, Dict]] = {}
+
         # callbacks that are called when a 1-minute bar is appended / closed
         self._on_bar_close_callbacks: List[Callable[[str, dict], None]] = []
 
         # metrics
-        self.bars_received = 0
-        self.bars_closed = 0
         self.replay_mode = False
 
         # ensure snapshot directory exists when saving
         if self.snapshot_path:
             os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
 
+    @property
+    def bars_received(self) -> int:
+        return sum(ring.bars_received for ring in list(self._rings.values()))
+
+    @property
+    def bars_closed(self) -> int:
+        return sum(ring.bars_closed for ring in list(self._rings.values()))
+
     # ---------------------
     # Internal helpers
     # ---------------------
-    def _ensure_inst(self, inst: str):
+    def _ensure_inst(self, inst: str) -> _BarRing:
+        ring = self._rings.get(inst)
+        if ring is not None:
+            return ring
         with self._global_lock:
-            if inst not in self._bars:
-                self._bars[inst] = deque(maxlen=self.max_len)
+            if inst not in self._rings:
+                self._rings[inst] = _BarRing(self.max_len)
+            return self._rings[inst]
 
-    def _lock_for(self, inst: str):
-        # simple per-instrument lock object
-        return self._locks[inst]
+    def _column(self, inst: str, col: int, n: Optional[int] = None) -> np.ndarray:
+        ring = self._rings.get(inst)
+        if ring is None:
+            return np.empty(0, dtype=np.float32)
+        return ring.read(lambda: ring.column(col, n))
 
     # ---------------------
     # Append / ingestion
@@ -86,18 +294,19 @@ class MarketScanner:
         Ingest a completed 1-minute bar. Triggers on_bar_close callbacks.
         Safe to call from websocket thread.
         """
-        self._ensure_inst(inst)
-        with self._lock_for(inst):
-            bar = {
-                "time": time_iso,
-                "open": open_p,
-                "high": high_p,
-                "low": low_p,
-                "close": close_p,
-                "volume": volume
-            }
-            self._bars[inst].append(bar)
-            self.bars_closed += 1
+        ring = self._ensure_inst(inst)
+        with ring.lock:
+            ring.append(time_iso, open_p, high_p, low_p, close_p, volume)
+            ring.bars_closed += 1
+
+        bar = {
+            "time": time_iso,
+            "open": open_p,
+            "high": high_p,
+            "low": low_p,
+            "close": close_p,
+            "volume": volume
+        }
 
         # call callbacks outside lock to avoid deadlocks
         for cb in list(self._on_bar_close_callbacks):
@@ -114,27 +323,24 @@ class MarketScanner:
         Aggregate a tick into the current minute bar.
         This method builds the active 1-minute bar from ticks when the feed is tick-level.
         If you already receive 1-minute OHLC, prefer append_ohlc_bar.
+        Naive timestamps are taken as exchange time; aware ones are converted.
         """
-        self._ensure_inst(inst)
+        ring = self._ensure_inst(inst)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(EXCHANGE_TZ).replace(tzinfo=None)
         ts_min = timestamp.replace(second=0, microsecond=0)
         time_iso = ts_min.strftime(ISOFMT)
 
-        with self._lock_for(inst):
-            bars = self._bars[inst]
-            if not bars or bars[-1]["time"] != time_iso:
+        with ring.lock:
+            if not ring.head or ring.times[ring.last] != time_iso:
                 # start a new bar
-                bar = {"time": time_iso, "open": price, "high": price, "low": price, "close": price, "volume": volume}
-                bars.append(bar)
-                self.bars_received += 1
+                ring.append(time_iso, price, price, price, price, volume)
+                ring.bars_received += 1
                 # We do NOT trigger callbacks on first tick of bar; only when the bar is closed via append_ohlc_bar
             else:
                 # update existing in-progress bar
-                bar = bars[-1]
-                bar["high"] = max(bar["high"], price)
-                bar["low"] = min(bar["low"], price)
-                bar["close"] = price
-                bar["volume"] = bar.get("volume", 0) + volume
-                self.bars_received += 1
+                ring.update_last(price, volume)
+                ring.bars_received += 1
 
     def update(
         self,
@@ -155,7 +361,7 @@ class MarketScanner:
             self.append_ohlc_bar(instrument, time_iso, price, high, low, close, volume)
         else:
             # if no timestamp passed, assume current minute
-            self.append_tick(instrument, datetime.now(), price, volume)
+            self.append_tick(instrument, exchange_now(), price, volume)
 
     # ---------------------
     # Accessors & getters
@@ -164,41 +370,169 @@ class MarketScanner:
         """
         Return last n bars as list (oldest -> newest).
         """
-        if inst not in self._bars:
+        ring = self._rings.get(inst)
+        if ring is None:
             return []
-        with self._lock_for(inst):
-            bars = list(self._bars[inst])[-n:]
-            return bars
+        return ring.read(lambda: ring.bars(n))
+
+    def get_last_n_times(self, inst: str, n: int) -> List[str]:
+        """
+        Times of the last n bars (oldest -> newest), without building bar dicts.
+        """
+        ring = self._rings.get(inst)
+        if ring is None:
+            return []
+        return ring.read(lambda: ring.tail_times(n))
 
     def get_last_bar(self, inst: str) -> Optional[dict]:
-        if inst not in self._bars or not self._bars[inst]:
+        ring = self._rings.get(inst)
+        if ring is None or not ring.head:
             return None
-        with self._lock_for(inst):
-            return dict(self._bars[inst][-1])
+        return ring.read(lambda: ring.bar(ring.last))
+
+    def get_last_closed_bar(self, inst: str) -> Optional[dict]:
+        """
+        The bar before the newest one. The newest bar keeps taking ticks
+        (append_tick) until the next minute starts; everything before it is
+        final.
+        """
+        ring = self._rings.get(inst)
+        if ring is None or ring.head < 2:
+            return None
+        return ring.read(lambda: ring.bar((ring.head - 2) % ring.max_len))
+
+    def get_last_ts(self, inst: str) -> Optional[str]:
+        """
+        Time of the newest bar. Changes only when a new 1-minute bar starts,
+        so it keys computations over the closed bars (all but the newest,
+        which still changes with every tick) - not over the newest bar.
+        """
+        ring = self._rings.get(inst)
+        if ring is None or not ring.head:
+            return None
+        return ring.times[ring.last]
+
+    # The array getters below return float32 NumPy copies of the ring
+    # buffer, consistent even while the feed thread keeps writing.
+
+    def get_prices(self, inst: str) -> np.ndarray:
+        return self._column(inst, CLOSE)
+
+    def get_highs(self, inst: str) -> np.ndarray:
+        return self._column(inst, HIGH)
 
-    def get_prices(self, inst: str) -> List[float]:
-        return [b["close"] for b in self.get_last_n_bars(inst, self.max_len)]
+    def get_lows(self, inst: str) -> np.ndarray:
+        return self._column(inst, LOW)
 
-    def get_highs(self, inst: str) -> List[float]:
-        return [b["high"] for b in self.get_last_n_bars(inst, self.max_len)]
+    def get_closes(self, inst: str) -> np.ndarray:
+        return self._column(inst, CLOSE)
 
-    def get_lows(self, inst: str) -> List[float]:
-        return [b["low"] for b in self.get_last_n_bars(inst, self.max_len)]
+    def get_volumes(self, inst: str) -> np.ndarray:
+        return self._column(inst, VOLUME)
 
-    def get_closes(self, inst: str) -> List[float]:
-        return [b["close"] for b in self.get_last_n_bars(inst, self.max_len)]
+    def get_last_n_closes(self, inst: str, n: int) -> np.ndarray:
+        return self._column(inst, CLOSE, n)
 
-    def get_volumes(self, inst: str) -> List[float]:
-        return [b["volume"] for b in self.get_last_n_bars(inst, self.max_len)]
+    def avg_volume(self, inst: str, lookback: int = VOLUME_WINDOW) -> Optional[float]:
+        """
+        Average volume of the last `lookback` bars (fewer if not available yet).
+        O(1) for the default lookback via the ring's running sum.
+        """
+        ring = self._rings.get(inst)
+        if ring is None or not ring.head:
+            return None
+        if lookback == ring.vol_window:
+            return ring.read(ring.avg_volume)
+        vols = ring.read(lambda: ring.column(VOLUME, lookback))
+        return float(vols.mean(dtype=np.float64))
 
-    def get_last_n_closes(self, inst: str, n: int) -> List[float]:
-        return [b["close"] for b in self.get_last_n_bars(inst, n)]
+    def get_sr(self, inst: str, lookback: int = 120) -> Dict:
+        """
+        compute_sr_levels over the last `lookback` closed 1-minute bars
+        (the newest, still forming bar is left out), memoised per
+        instrument until a new bar starts; that is exact, since closed
+        bars do not change within a bar.
+        For callers working on the 1m series (detect_pullback_signal's
+        sr_levels, evaluate_all strategies); StrategyEngine keeps its own
+        per-bar cache of SR on 5m candles.
+        """
+        ts = self.get_last_ts(inst)
+        cached = self._sr_cache.get(inst)
+        if cached is not None and cached[0] == ts and cached[1] == lookback:
+            return cached[2]
+
+        ring = self._rings.get(inst)
+        if ring is None:
+            return compute_sr_levels([], [])
+
+        highs, lows = ring.read(
+            lambda: (ring.column(HIGH, lookback + 1)[:-1], ring.column(LOW, lookback + 1)[:-1])
+        )
+        sr = compute_sr_levels(highs, lows, lookback=lookback)
+        self._sr_cache[inst] = (ts, lookback, sr)
+        return sr
 
     def has_enough_data(self, inst: str, min_bars: int = 30) -> bool:
-        return (inst in self._bars and len(self._bars[inst]) >= min_bars)
+        ring = self._rings.get(inst)
+        return ring is not None and len(ring) >= min_bars
 
     def active_instruments(self) -> List[str]:
-        return list(self._bars.keys())
+        return list(self._rings.keys())
+
+    def get_series(self, inst: str, dtype=np.float32) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (highs, lows, closes, volumes) of one instrument from a single
+        consistent read, copied once into `dtype` (e.g. np.float64 for
+        consumers that accumulate). Empty arrays for unknown instruments.
+        """
+        ring = self._rings.get(inst)
+        if ring is None:
+            return tuple(np.empty((4, 0), dtype=dtype))
+        return self._series(ring, dtype)
+
+    def _series(self, ring: _BarRing, dtype=np.float32):
+        # consistent (highs, lows, closes, volumes) rows of one ring
+        highs, lows, closes, volumes = ring.read(lambda: ring.hlcv(dtype))
+        return highs, lows, closes, volumes
+
+    def evaluate_all(
+        self,
+        strategy_fn: Callable,
+        executor=None,
+        min_bars: int = 30,
+        chunksize: int = 1
+    ) -> Dict[str, object]:
+        """
+        Run strategy_fn(inst, highs, lows, closes, volumes) for every
+        instrument with at least min_bars bars; returns {inst: result} for
+        the non-None results.
+
+        The float32 series are copied out of the rings up front, so the
+        calls share no scanner state and can be mapped over an executor:
+        - None: run inline
+        - ThreadPoolExecutor: live mode, no fork / pickling; the NumPy and
+          Numba kernels do the heavy lifting
+        - ProcessPoolExecutor: backtests / replays; strategy_fn must be a
+          module-level function and the arrays are pickled per call (pass
+          a larger chunksize to batch them)
+        """
+        insts = []
+        columns = []
+        for inst, ring in list(self._rings.items()):
+            if len(ring) >= min_bars:
+                insts.append(inst)
+                columns.append(self._series(ring))
+
+        if not insts:
+            return {}
+
+        highs, lows, closes, volumes = zip(*columns)
+        if executor is None:
+            results = map(strategy_fn, insts, highs, lows, closes, volumes)
+        else:
+            results = executor.map(strategy_fn, insts, highs, lows, closes, volumes, chunksize=chunksize)
+
+        return {inst: res for inst, res in zip(insts, results) if res is not None}
 
     # ---------------------
     # Callbacks / events
@@ -257,45 +591,105 @@ class MarketScanner:
     # ---------------------
     # Persistence / snapshot
     # ---------------------
+    @staticmethod
+    def _sidecar_path(path: str) -> str:
+        return f"{path}.json"
+
+    def _read_npz_snapshot(self, path: str):
+        rings = {}
+        with np.load(path, allow_pickle=False) as data:
+            for i, inst in enumerate(data["instruments"].tolist()):
+                rings[inst] = _BarRing.from_arrays(
+                    self.max_len, data[f"ohlcv_{i}"], data[f"times_{i}"].tolist()
+                )
+
+        meta = {}
+        sidecar = self._sidecar_path(path)
+        if os.path.exists(sidecar):
+            with open(sidecar, "r") as f:
+                meta = json.load(f)
+        return rings, meta
+
+    def _read_json_snapshot(self, path: str):
+        # older format: one JSON file, {"bars": {inst: [bar dict, ...]}, ...meta}
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        rings = {}
+        for inst, bars in data.get("bars", {}).items():
+            ohlcv = np.array([[bar[k] for bar in bars] for k in BAR_FIELDS], dtype=np.float32)
+            rings[inst] = _BarRing.from_arrays(
+                self.max_len, ohlcv.reshape(5, len(bars)), [bar["time"] for bar in bars]
+            )
+        return rings, data
+
     def save_snapshot(self, path: Optional[str] = None):
         """
-        Save minimal scanner state: bars (last N), last_alert_time, dedupe timestamps, paused_until.
+        Save minimal scanner state.
+
+        Bars go to `path` as a compressed .npz: per instrument i the
+        float32 (5, n) array "ohlcv_<i>" and the bar times "times_<i>",
+        with the instrument keys in "instruments". last_alert_time, dedupe
+        timestamps and paused_until go to a JSON sidecar `<path>.json`.
+        Both files are written to a temp file and swapped in.
         """
         path = path or self.snapshot_path
         if not path:
             raise ValueError("No snapshot path configured")
 
-        data = {
-            "bars": {},
+        arrays = {}
+        with self._global_lock:
+            insts = list(self._rings)
+            for i, inst in enumerate(insts):
+                ring = self._rings[inst]
+                with ring.lock:
+                    ohlcv, times = ring.export()
+                arrays[f"ohlcv_{i}"] = ohlcv
+                arrays[f"times_{i}"] = np.array(times, dtype=str)
+        arrays["instruments"] = np.array(insts, dtype=str)
+
+        meta = {
             "last_alert_time": self.last_alert_time,
             "dedupe_map": self._dedupe_map,
             "paused_until": self._paused_until,
             "timestamp": _now_iso()
         }
 
-        with self._global_lock:
-            for inst, dq in self._bars.items():
-                data["bars"][inst] = list(dq)
-
         tmp = f"{path}.tmp"
-        with open(tmp, "w") as f:
-            json.dump(data, f)
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
         os.replace(tmp, path)
 
+        sidecar = self._sidecar_path(path)
+        tmp = f"{sidecar}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, sidecar)
+
     def load_snapshot(self, path: Optional[str] = None):
+        """
+        Restore a snapshot written by save_snapshot. A snapshot in the
+        older single-JSON format at the same path is read too. Returns
+        False (with a message) when there is none or it cannot be read.
+        """
         path = path or self.snapshot_path
         if not path or not os.path.exists(path):
             return False
-        with open(path, "r") as f:
-            data = json.load(f)
+
+        try:
+            if zipfile.is_zipfile(path):
+                rings, meta = self._read_npz_snapshot(path)
+            else:
+                rings, meta = self._read_json_snapshot(path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[MarketScanner] cannot load snapshot {path}: {e}")
+            return False
 
         with self._global_lock:
-            for inst, bars in data.get("bars", {}).items():
-                dq = deque(bars, maxlen=self.max_len)
-                self._bars[inst] = dq
-            self.last_alert_time = data.get("last_alert_time", {})
-            self._dedupe_map = defaultdict(dict, data.get("dedupe_map", {}))
-            self._paused_until = data.get("paused_until", {})
+            self._rings.update(rings)
+            self.last_alert_time = meta.get("last_alert_time", {})
+            self._dedupe_map = defaultdict(dict, meta.get("dedupe_map", {}))
+            self._paused_until = meta.get("paused_until", {})
 
         return True
 
@@ -307,20 +701,21 @@ class MarketScanner:
         Replay a list of bar dicts (oldest->newest). Useful for unit tests/backtests.
         """
         self.replay_mode = True
-        self._ensure_inst(inst)
-        with self._lock_for(inst):
-            for bar in bars:
-                # minimal validation
-                if not all(k in bar for k in ("time", "open", "high", "low", "close", "volume")):
-                    continue
-                self._bars[inst].append(bar)
-                self.bars_closed += 1
-                if call_callbacks:
-                    for cb in list(self._on_bar_close_callbacks):
-                        try:
-                            cb(inst, bar)
-                        except Exception:
-                            pass
+        ring = self._ensure_inst(inst)
+        for bar in bars:
+            # minimal validation
+            if not all(k in bar for k in ("time", "open", "high", "low", "close", "volume")):
+                continue
+            with ring.lock:
+                ring.append(bar["time"], bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"])
+                ring.bars_closed += 1
+            if call_callbacks:
+                # outside the write lock: callbacks may feed the scanner
+                for cb in list(self._on_bar_close_callbacks):
+                    try:
+                        cb(inst, bar)
+                    except Exception:
+                        pass
         self.replay_mode = False
 
     def validate_bar_sequence(self, inst: str, max_gap_seconds: int = 90) -> List[dict]:
@@ -328,11 +723,10 @@ class MarketScanner:
         Return a list of gaps (as dicts) where time difference between consecutive bars > max_gap_seconds.
         """
         gaps = []
-        bars = self.get_last_n_bars(inst, self.max_len)
         prev_ts = None
-        for b in bars:
+        for t in self.get_last_n_times(inst, self.max_len):
             try:
-                ts = datetime.strptime(b["time"], ISOFMT)
+                ts = datetime.strptime(t, ISOFMT)
             except Exception:
                 continue
             if prev_ts and (ts - prev_ts).total_seconds() > max_gap_seconds:
@@ -347,19 +741,19 @@ class MarketScanner:
         """
         Basic scanner health summary.
         """
-        now_ts = datetime.now()
-        busy = sum(1 for k in self._bars if self._bars[k])
+        now_ts = exchange_now()
+        busy = sum(1 for k in self._rings if self._rings[k].head)
         last_bar_diff = {}
-        for k, dq in self._bars.items():
-            if dq:
+        for k, ring in self._rings.items():
+            if ring.head:
                 try:
-                    ts = datetime.strptime(dq[-1]["time"], ISOFMT)
+                    ts = datetime.strptime(ring.times[ring.last], ISOFMT)
                     last_bar_diff[k] = (now_ts - ts).total_seconds()
                 except Exception:
                     last_bar_diff[k] = None
 
         return {
-            "instruments_tracked": len(self._bars),
+            "instruments_tracked": len(self._rings),
             "bars_received": self.bars_received,
             "bars_closed": self.bars_closed,
             "recent_busy": busy,
@@ -378,11 +772,20 @@ class MarketScanner:
             since_dt = datetime.strptime(since_iso, ISOFMT)
         except Exception:
             return out
-        for b in self.get_last_n_bars(inst, self.max_len):
+        ring = self._rings.get(inst)
+        if ring is None:
+            return out
+        times, block = ring.read(lambda: (ring.tail_times(), ring._tail_slice().copy()))
+
+        # filter on the times; build dicts only for the bars kept
+        keep = []
+        for k, t in enumerate(times):
             try:
-                ts = datetime.strptime(b["time"], ISOFMT)
-                if ts >= since_dt:
-                    out.append(b)
+                if datetime.strptime(t, ISOFMT) >= since_dt:
+                    keep.append(k)
             except Exception:
                 continue
+
+        for k, (o, h, l, c, v) in zip(keep, block[:, keep].T.tolist()):
+            out.append({"time": times[k], "open": o, "high": h, "low": l, "close": c, "volume": v})
         return out
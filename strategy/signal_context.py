@@ -0,0 +1,58 @@
+# strategy/signal_context.py
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from strategy.volume_filter import VolumeContext
+
+
+# =========================
+# Shared Signal Context
+# =========================
+
+@dataclass(slots=True)
+class SignalContext:
+    """
+    One evaluation's 1m series plus the measurements that both
+    detect_pullback_signal and final_trade_decision need.
+
+    build_context fills the arrays (float64, read once from the scanner)
+    and avg_volume. The pullback detector fills atr / vol_ctx from its
+    kernel pass; the decision then reuses them instead of walking the
+    series again. None means "not measured yet".
+    """
+    highs: np.ndarray
+    lows: np.ndarray
+    closes: np.ndarray
+    volumes: np.ndarray
+    avg_volume: Optional[float] = None
+    atr: Optional[float] = None
+    vol_ctx: Optional[VolumeContext] = None
+
+    @property
+    def price(self) -> float:
+        return float(self.closes[-1])
+
+
+def build_context(scanner, inst_key: str) -> Optional[SignalContext]:
+    """
+    Read the 1m highs / lows / closes / volumes of `inst_key` in one
+    consistent scanner read, promoted to float64 in the same copy (the
+    scanner stores float32; ATR / volume sums and scores keep full
+    precision and stay plain floats downstream).
+    Returns None while there are no bars yet.
+    """
+    highs, lows, closes, volumes = scanner.get_series(inst_key, dtype=np.float64)
+
+    if not len(closes):
+        return None
+
+    return SignalContext(
+        highs=highs,
+        lows=lows,
+        closes=closes,
+        volumes=volumes,
+        avg_volume=scanner.avg_volume(inst_key)
+    )
@@ -1,72 +1,126 @@
-from typing import List, Dict, Optional, Tuple
-from statistics import mean
+from operator import itemgetter
+from typing import List, Dict, Optional, Tuple, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# field readers for level / candle dicts (map runs them in C)
+_LEVEL = itemgetter("level")
+_HIGH = itemgetter("high")
+_LOW = itemgetter("low")
 
 
 # -------------------------------------------------
 # Helpers
 # -------------------------------------------------
 
-def _find_local_extrema(values: List[float], window: int = 5) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
+def _sr_result(supports: List[Dict], resistances: List[Dict]) -> Dict:
+    """
+    SR result: the level dicts plus their levels (float64) and strengths
+    (int64) as arrays in the same order (supports ascending, resistances
+    descending). The arrays are built once per SR refresh so per-tick
+    consumers (get_nearest_sr, the pullback kernel) do not rebuild them.
+    """
+    return {
+        "supports": supports,
+        "resistances": resistances,
+        "support_levels": _levels_of(supports),
+        "resistance_levels": _levels_of(resistances),
+        "support_strengths": _strengths_of(supports),
+        "resistance_strengths": _strengths_of(resistances)
+    }
 
-    n = len(values)
-    maxima, minima = [], []
 
-    if n < window * 2 + 1:
-        return maxima, minima
+def _levels_of(levels: List[Dict]) -> np.ndarray:
+    return np.fromiter(map(_LEVEL, levels), dtype=np.float64, count=len(levels))
 
-    half = window // 2
 
-    for i in range(half, n - half):
+def _strengths_of(levels: List[Dict]) -> np.ndarray:
+    return np.array([lv.get("strength", 1) for lv in levels], dtype=np.int64)
 
-        center = values[i]
-        left = values[i - half:i]
-        right = values[i + 1:i + 1 + half]
 
-        if all(center > x for x in left + right):
-            maxima.append((i, center))
+def _side_arrays(sr_levels: Dict, side: str) -> Tuple[np.ndarray, np.ndarray]:
+    # side: "support" / "resistance"
+    lvls = sr_levels.get(f"{side}_levels")
+    strengths = sr_levels.get(f"{side}_strengths")
+    if lvls is not None and strengths is not None:
+        return lvls, strengths
 
-        if all(center < x for x in left + right):
-            minima.append((i, center))
+    # result without the arrays (built elsewhere): build them from the
+    # dicts, sorted the way get_nearest_sr searches them (supports
+    # ascending, resistances descending) with strengths permuted alongside
+    levels = sr_levels.get(f"{side}s", [])
+    lvls = _levels_of(levels)
+    order = np.argsort(lvls if side == "support" else -lvls, kind="stable")
+    return lvls[order], _strengths_of(levels)[order]
 
-    return maxima, minima
 
+def level_arrays(sr_levels: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (support_levels, resistance_levels) of an SR result; built from the
+    level dicts for results that do not carry the arrays.
+    """
+    sup = sr_levels.get("support_levels")
+    if sup is None:
+        sup = _levels_of(sr_levels.get("supports", []))
 
-def _cluster_levels(peaks: List[float], tol_pct: float = 0.004) -> List[Dict]:
+    res = sr_levels.get("resistance_levels")
+    if res is None:
+        res = _levels_of(sr_levels.get("resistances", []))
 
-    if not peaks:
-        return []
+    return sup, res
 
-    sorted_peaks = sorted(peaks)
 
-    clusters = []
-    cluster = [sorted_peaks[0]]
+def _find_local_extrema(values: List[float], window: int = 5) -> Tuple[List[Tuple[int, float]], List[Tuple[int, float]]]:
 
-    for p in sorted_peaks[1:]:
+    n = len(values)
 
-        avg = sum(cluster) / len(cluster)
-        tol = avg * tol_pct
+    if n < window * 2 + 1:
+        return [], []
 
-        if abs(p - avg) <= tol:
-            cluster.append(p)
-        else:
-            clusters.append(cluster)
-            cluster = [p]
+    half = window // 2
 
-    clusters.append(cluster)
+    # strict extremum vs. `half` neighbours on each side, one vectorised pass
+    arr = np.asarray(values, dtype=np.float64)
+    is_max, is_min = _batch_extrema_masks(arr[np.newaxis, :], window)
+    centers = arr[half:n - half]
 
-    out = []
+    maxima = [(int(i) + half, c) for i, c in zip(np.flatnonzero(is_max[0]), centers[is_max[0]].tolist())]
+    minima = [(int(i) + half, c) for i, c in zip(np.flatnonzero(is_min[0]), centers[is_min[0]].tolist())]
+
+    return maxima, minima
 
-    for c in clusters:
 
-        lvl = mean(c)
+def _cluster_levels(peaks: List[float], tol_pct: float = 0.004) -> List[Dict]:
+    """
+    Group sorted peaks into levels: a new cluster starts wherever the gap
+    to the previous peak exceeds tol_pct of that peak. Each level is the
+    mean of its cluster.
 
-        out.append({
-            "level": round(lvl, 6),
-            "count": len(c),
-            "strength": min(len(c), 4)
-        })
+    (Earlier versions compared each peak with the running cluster average,
+    which let the center drift as a cluster grew; chains of close peaks
+    can now form one wider cluster.)
+    """
 
-    return out
+    if not len(peaks):
+        return []
+
+    arr = np.sort(np.asarray(peaks, dtype=np.float64))
+
+    breaks = np.flatnonzero(np.diff(arr) > arr[:-1] * tol_pct) + 1
+    starts = np.concatenate(([0], breaks))
+    counts = np.diff(np.append(starts, len(arr)))
+    levels = np.add.reduceat(arr, starts) / counts
+
+    return [
+        {
+            "level": round(lvl, 6),
+            "count": cnt,
+            "strength": min(cnt, 4)
+        }
+        for lvl, cnt in zip(levels.tolist(), counts.tolist())
+    ]
 
 
 # -------------------------------------------------
@@ -82,12 +136,12 @@ def compute_sr_levels_from_5m(
 ) -> Dict[str, List[Dict]]:
 
     if not candles_5m:
-        return {"supports": [], "resistances": []}
+        return _sr_result([], [])
 
     candles = candles_5m[-lookback:]
 
-    highs = [c["high"] for c in candles]
-    lows = [c["low"] for c in candles]
+    highs = list(map(_HIGH, candles))
+    lows = list(map(_LOW, candles))
 
     max_extrema, _ = _find_local_extrema(highs, window=extrema_window)
     _, min_extrema = _find_local_extrema(lows, window=extrema_window)
@@ -95,16 +149,104 @@ def compute_sr_levels_from_5m(
     resistances = [val for _, val in max_extrema]
     supports = [val for _, val in min_extrema]
 
+    return _levels_from_peaks(supports, resistances, cluster_tol_pct, max_levels)
+
+
+def _levels_from_peaks(
+    supports: List[float],
+    resistances: List[float],
+    cluster_tol_pct: float,
+    max_levels: int
+) -> Dict[str, List[Dict]]:
+
     resist_clusters = _cluster_levels(resistances, tol_pct=cluster_tol_pct)
     supp_clusters = _cluster_levels(supports, tol_pct=cluster_tol_pct)
 
     supp_sorted = sorted(supp_clusters, key=lambda x: x["level"])[:max_levels]
     res_sorted = sorted(resist_clusters, key=lambda x: x["level"], reverse=True)[:max_levels]
 
-    return {
-        "supports": supp_sorted,
-        "resistances": res_sorted
-    }
+    return _sr_result(supp_sorted, res_sorted)
+
+
+# -------------------------------------------------
+# BATCH SR CALCULATION (many instruments at once)
+# -------------------------------------------------
+
+def stack_tails(series: Sequence[Sequence[float]], lookback: int = 120) -> np.ndarray:
+    """
+    Stack the last `lookback` values of each series into an (N, lookback)
+    float64 matrix. Shorter series are right-aligned and left-padded with NaN.
+    """
+    mat = np.full((len(series), lookback), np.nan)
+    for row, values in enumerate(series):
+        tail = np.asarray(values[-lookback:], dtype=np.float64)
+        if len(tail):
+            mat[row, lookback - len(tail):] = tail
+    return mat
+
+
+def _batch_extrema_masks(mat: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Strict local maxima / minima for every row of `mat` in one pass.
+    Masks are aligned with mat[:, half:-half]; NaN never qualifies and
+    disqualifies any neighbour whose window touches it.
+    """
+    half = window // 2
+    win = sliding_window_view(mat, 2 * half + 1, axis=1)
+    neighbours = np.concatenate((win[..., :half], win[..., half + 1:]), axis=-1)
+    centers = mat[:, half:mat.shape[1] - half]
+
+    with np.errstate(invalid="ignore"):
+        is_max = centers > neighbours.max(axis=-1)
+        is_min = centers < neighbours.min(axis=-1)
+
+    return is_max, is_min
+
+
+def compute_sr_levels_batch(
+    highs_mat: np.ndarray,
+    lows_mat: np.ndarray,
+    extrema_window: int = 5,
+    cluster_tol_pct: float = 0.004,
+    max_levels: int = 3
+) -> List[Dict[str, List[Dict]]]:
+    """
+    SR levels for N instruments at once.
+
+    highs_mat / lows_mat are (N, lookback) matrices (see stack_tails).
+    Pivot detection runs vectorised over the whole matrix; only the
+    clustering of each row's pivots stays per-instrument.
+    Row i of the result equals compute_sr_levels(highs_i, lows_i).
+    """
+    n_rows, width = highs_mat.shape
+    half = extrema_window // 2
+
+    if width < 2 * half + 1:
+        return [_sr_result([], []) for _ in range(n_rows)]
+
+    is_max, _ = _batch_extrema_masks(highs_mat, extrema_window)
+    _, is_min = _batch_extrema_masks(lows_mat, extrema_window)
+
+    centers_h = highs_mat[:, half:width - half]
+    centers_l = lows_mat[:, half:width - half]
+
+    # same minimum history as _find_local_extrema
+    valid = np.minimum(
+        np.count_nonzero(~np.isnan(highs_mat), axis=1),
+        np.count_nonzero(~np.isnan(lows_mat), axis=1)
+    ) >= extrema_window * 2 + 1
+
+    out = []
+    for row in range(n_rows):
+        if not valid[row]:
+            out.append(_sr_result([], []))
+            continue
+
+        resistances = centers_h[row][is_max[row]].tolist()
+        supports = centers_l[row][is_min[row]].tolist()
+        out.append(_levels_from_peaks(supports, resistances, cluster_tol_pct, max_levels))
+
+    return out
 
 
 # -------------------------------------------------
@@ -121,8 +263,8 @@ def compute_sr_levels(
     Converts highs/lows into pseudo candles.
     """
 
-    if not highs or not lows:
-        return {"supports": [], "resistances": []}
+    if len(highs) == 0 or len(lows) == 0:
+        return _sr_result([], [])
 
     highs = highs[-lookback:]
     lows = lows[-lookback:]
@@ -147,51 +289,77 @@ def get_nearest_sr(
     sr_levels: Dict[str, List[Dict]],
     max_search_pct: float = 0.03
 ) -> Optional[Dict]:
+    """
+    Nearest support / resistance to price.
+
+    Relies on the ordering produced by compute_sr_levels (supports
+    ascending, resistances descending); results without the level arrays
+    are sorted that way first. Both distance measures are
+    monotone in |price - level| on each side of price, so only the two
+    levels adjacent to price (np.searchsorted on the level arrays) can
+    be nearest. Distances of the candidates are computed as arrays and
+    the result dict is built only for the winner (support wins ties).
+    """
 
-    supports = sr_levels.get("supports", [])
-    resistances = sr_levels.get("resistances", [])
+    sup_levels, sup_strengths = _side_arrays(sr_levels, "support")
+    res_levels, res_strengths = _side_arrays(sr_levels, "resistance")
 
-    best = None
     best_dist = float("inf")
+    best_levels = best_strengths = None
+    best_idx = -1
+    best_type = None
+
+    i = int(np.searchsorted(sup_levels, price))
+    lo = max(0, i - 1)
+    cand = sup_levels[lo:i + 1]
+
+    if len(cand):
+        dists = np.abs(price - cand) / np.maximum(cand, 1e-9)
+        k = int(np.argmin(dists))
+        best_dist = float(dists[k])
+        best_levels, best_strengths, best_idx, best_type = sup_levels, sup_strengths, lo + k, "support"
+
+    # resistances descend: j = number of levels above price
+    j = len(res_levels) - int(np.searchsorted(res_levels[::-1], price, side="right"))
+    lo = max(0, j - 1)
+    cand = res_levels[lo:j + 1]
+
+    if len(cand):
+        dists = np.abs(cand - price) / max(price, 1e-9)
+        k = int(np.argmin(dists))
+        if dists[k] < best_dist:
+            best_dist = float(dists[k])
+            best_levels, best_strengths, best_idx, best_type = res_levels, res_strengths, lo + k, "resistance"
+
+    if best_type is None or best_dist > max_search_pct:
+        return None
 
-    for s in supports:
-
-        lvl = s["level"]
-        dist = abs(price - lvl) / max(lvl, 1e-9)
-
-        if dist < best_dist:
-            best_dist = dist
-            best = {
-                "type": "support",
-                "level": lvl,
-                "dist_pct": dist,
-                "strength": s.get("strength", 1)
-            }
-
-    for r in resistances:
-
-        lvl = r["level"]
-        dist = abs(lvl - price) / max(price, 1e-9)
-
-        if dist < best_dist:
-            best_dist = dist
-            best = {
-                "type": "resistance",
-                "level": lvl,
-                "dist_pct": dist,
-                "strength": r.get("strength", 1)
-            }
-
-    if best and best["dist_pct"] <= max_search_pct:
-        return best
-
-    return None
+    return {
+        "type": best_type,
+        "level": float(best_levels[best_idx]),
+        "dist_pct": best_dist,
+        "strength": int(best_strengths[best_idx])
+    }
 
 
 # -------------------------------------------------
 # LOCATION SCORE
 # -------------------------------------------------
 
+# score sign by (trade direction, level type): trading off the level in
+# the trade's favour counts +1, into the opposite level -1
+_SIGN = {
+    ("LONG", "support"): 1,
+    ("LONG", "resistance"): -1,
+    ("SHORT", "resistance"): 1,
+    ("SHORT", "support"): -1,
+}
+
+# min(1.5, 0.6 + 0.2 * strength) for integer strengths (the factor is
+# saturated long before the last entry)
+_STRENGTH_FACTOR = tuple(min(1.5, 0.6 + 0.2 * i) for i in range(32))
+
+
 def sr_location_score(
     price: float,
     nearest_sr: Optional[Dict],
@@ -210,17 +378,8 @@ def sr_location_score(
     closeness = (proximity_threshold - dist) / proximity_threshold
 
     strength = nearest_sr.get("strength", 1)
-    strength_factor = min(1.5, 0.6 + 0.2 * strength)
-
-    typ = nearest_sr["type"]
-
-    if direction == "LONG":
-        sign = 1 if typ == "support" else -1
-    elif direction == "SHORT":
-        sign = 1 if typ == "resistance" else -1
-    else:
-        sign = 0
+    strength_factor = _STRENGTH_FACTOR[min(int(strength), 31)]
 
-    score = sign * closeness * strength_factor
+    score = _SIGN.get((direction, nearest_sr["type"]), 0) * closeness * strength_factor
 
-    return round(max(min(score, 1.0), -1.0), 3)
+    return max(min(score, 1.0), -1.0)
@@ -1,51 +1,238 @@
-from strategy.market_regime import detect_market_regime
-from strategy.htf_bias import get_htf_bias
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from strategy.market_regime import detect_market_regime, MarketRegime
+from strategy.htf_bias import HTFStructure, apply_vwap_bias, get_htf_structure
 from strategy.pullback_detector import detect_pullback_signal
-from strategy.decision_engine import final_trade_decision
+from strategy.decision_engine import final_trade_decision, make_decider, Thresholds
+from strategy.sr_levels import compute_sr_levels, compute_sr_levels_batch, stack_tails
+from strategy.volatility_filter import compute_atr
+from strategy.signal_context import build_context
 
 from strategy.vwap_filter import VWAPCalculator
 from strategy.mtf_builder import MTFBuilder
-from strategy.mtf_context import analyze_mtf
+from strategy.mtf_context import MTFContext, analyze_mtf
+
+
+# 5m candles needed before an instrument is evaluated
+MIN_5M_CANDLES = 60
+
+
+# NSE cash session open, in exchange time (Asia/Kolkata); the scanner
+# stamps bars in that zone (scanner.EXCHANGE_TZ), not the host's
+SESSION_OPEN = "09:15"
+
+
+def _is_first_candle_after_break(bar_time: str) -> bool:
+    """True for the session's opening 1m bar ("YYYY-MM-DDTHH:MM:SS")."""
+    return bar_time[11:16] == SESSION_OPEN
+
+
+class BarContext(NamedTuple):
+    """
+    Per-bar results computed from the closed 1m bars only (the forming
+    bar is excluded), so they only change when a new 1m bar starts. Keyed
+    by the newest bar's ISO time, so a new trading day never reuses an
+    entry.
+    """
+    ts: str
+    sr_levels: Dict
+    atr: Optional[float]
+    regime: MarketRegime
+    htf: HTFStructure           # EMA/structure of the closed 5m candles; VWAP is applied per tick
 
 
 class StrategyEngine:
     """
     FINAL CLEAN STRATEGY ENGINE
 
-    Flow:
-    MTF (5m/15m) → HTF (direction) → Regime (5m) → VWAP → Pullback → Decision
+    Flow (cheapest gates first):
+    VWAP → Session → HTF (direction) → Regime (5m) → MTF (5m/15m) → Pullback → Decision
     """
 
-    def __init__(self, scanner, vwap_calculators):
+    def __init__(self, scanner, vwap_calculators, thresholds: Optional[Thresholds] = None):
         self.scanner = scanner
+        # missing instruments get a fresh session VWAP on first use
+        if not isinstance(vwap_calculators, defaultdict):
+            vwap_calculators = defaultdict(VWAPCalculator, vwap_calculators)
         self.vwap_calculators = vwap_calculators
         self.mtf_builder = MTFBuilder()
 
+        # decision function specialised to the thresholds (default: module one)
+        self._decide = final_trade_decision if thresholds is None else make_decider(thresholds)
+
+        # inst_key -> BarContext of the latest bar
+        self._cache: Dict[str, BarContext] = {}
+        # inst_key -> (bar ts, SR levels); also filled in bulk by prime_sr_levels
+        self._sr_cache: Dict[str, Tuple[str, Dict]] = {}
+        # inst_key -> (bar ts, MTF context); see _mtf_context
+        self._mtf_cache: Dict[str, Tuple[str, MTFContext]] = {}
+        # worker pool of evaluate_batch, created on first use
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _sr_levels(self, inst_key, ts, highs_5m, lows_5m) -> Dict:
+        cached = self._sr_cache.get(inst_key)
+        if cached is not None and cached[0] == ts:
+            return cached[1]
+
+        sr = compute_sr_levels(highs_5m, lows_5m)
+        self._sr_cache[inst_key] = (ts, sr)
+        return sr
+
+    def _mtf_context(self, inst_key, ts) -> MTFContext:
+        """
+        analyze_mtf of the current candles, computed once per 1m bar: the
+        5m / 15m candles are rolling blocks of closed 1m bars (see
+        _sync_bar), so they only move when a bar starts and ticks within
+        it reuse exactly the context they would recompute.
+        """
+        cached = self._mtf_cache.get(inst_key)
+        if cached is not None and cached[0] == ts:
+            return cached[1]
+
+        mtf = self.mtf_builder
+        ctx = analyze_mtf(
+            mtf.get_latest_5m(inst_key),
+            mtf.get_latest_15m(inst_key),
+            history_5m=mtf.get_tf_history(inst_key, minutes=5, lookback=3),
+            history_15m=mtf.get_tf_history(inst_key, minutes=15, lookback=50)
+        )
+        self._mtf_cache[inst_key] = (ts, ctx)
+        return ctx
+
+    def prime_sr_levels(self, inst_keys: Iterable[str], lookback: int = 120):
+        """
+        Compute SR levels for every instrument whose bar changed, in one
+        vectorised pass (see compute_sr_levels_batch). Call after the MTF
+        builder has been synced for these instruments.
+        """
+        stale, highs, lows = [], [], []
+
+        for inst_key in inst_keys:
+            ts = self.scanner.get_last_ts(inst_key)
+            cached = self._sr_cache.get(inst_key)
+            if cached is not None and cached[0] == ts:
+                continue
+
+            highs_5m, lows_5m, _, _ = self.mtf_builder.get_tf_history_arrays(inst_key, minutes=5, lookback=150)
+            if len(highs_5m) < MIN_5M_CANDLES:
+                continue
+
+            stale.append((inst_key, ts))
+            highs.append(highs_5m)
+            lows.append(lows_5m)
+
+        if not stale:
+            return
+
+        results = compute_sr_levels_batch(stack_tails(highs, lookback), stack_tails(lows, lookback))
+
+        for (inst_key, ts), sr in zip(stale, results):
+            self._sr_cache[inst_key] = (ts, sr)
+
+    def _bar_context(self, inst_key, highs, lows, closes) -> BarContext:
+        """
+        Return SR / ATR / regime / HTF structure for the current bar,
+        recomputing only when the scanner has started a new bar since the
+        last call. All four come from closed bars: the MTF builder only
+        holds closed minutes (see _sync_bar) and ATR leaves out the forming
+        1m bar, so ticks within a bar reuse exactly what they would
+        recompute. The per-tick stages (VWAP, pullback, decision) still see
+        the forming bar.
+        """
+        ts = self.scanner.get_last_ts(inst_key)
+        cached = self._cache.get(inst_key)
+
+        if cached is not None and cached.ts == ts:
+            return cached
+
+        highs_5m, lows_5m, closes_5m, _ = self.mtf_builder.get_tf_history_arrays(
+            inst_key, minutes=5, lookback=150
+        )
+
+        ctx = BarContext(
+            ts=ts,
+            sr_levels=self._sr_levels(inst_key, ts, highs_5m, lows_5m),
+            atr=compute_atr(highs[:-1], lows[:-1], closes[:-1]),
+            regime=detect_market_regime(
+                highs=highs_5m,
+                lows=lows_5m,
+                closes=closes_5m
+            ),
+            htf=get_htf_structure(
+                self.mtf_builder.get_tf_history(inst_key, minutes=5, lookback=150)
+            )
+        )
+        self._cache[inst_key] = ctx
+        return ctx
+
     def evaluate(self, inst_key: str, ltp: float):
+        if not self._sync_bar(inst_key):
+            return None
+        return self._evaluate_synced(inst_key, ltp)
+
+    def evaluate_many(self, items: List[Tuple[str, float]], executor=None) -> Dict[str, object]:
+        """
+        Evaluate several (inst_key, ltp) pairs from one feed message.
+        SR levels for all of them are computed in a single batch first.
+        Returns {inst_key: decision} for instruments that produced one.
+
+        If an executor (e.g. ThreadPoolExecutor) is given, the per-instrument
+        evaluation is mapped over it. Instruments share no mutable state at
+        that point: bar sync and SR priming run serially before.
+        """
+        synced = [(inst_key, ltp) for inst_key, ltp in items if self._sync_bar(inst_key)]
+
+        self.prime_sr_levels(inst_key for inst_key, _ in synced)
+
+        if executor is None:
+            decisions = [self._evaluate_synced(inst_key, ltp) for inst_key, ltp in synced]
+        else:
+            decisions = executor.map(lambda kv: self._evaluate_synced(*kv), synced)
+
+        out = {}
+        for (inst_key, _), decision in zip(synced, decisions):
+            if decision:
+                out[inst_key] = decision
+        return out
+
+    def evaluate_batch(self, inst_keys: List[str], ltps) -> Dict[str, object]:
+        """
+        evaluate_many over parallel inst_keys / ltps (list or array) on the
+        engine's thread pool (one worker per CPU). The Numba kernels
+        release the GIL, so instruments evaluate concurrently.
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+        items = [(inst_key, float(ltp)) for inst_key, ltp in zip(inst_keys, ltps)]
+        return self.evaluate_many(items, executor=self._pool)
+
+    def close(self):
+        """Shut down the evaluate_batch worker pool (if started)."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _sync_bar(self, inst_key: str) -> bool:
 
         # ==================================================
         # 1️⃣ DATA CHECK
         # ==================================================
         if not self.scanner.has_enough_data(inst_key, min_bars=30):
-            return None
-
-        prices = self.scanner.get_prices(inst_key)
-        highs = self.scanner.get_highs(inst_key)
-        lows = self.scanner.get_lows(inst_key)
-        closes = self.scanner.get_closes(inst_key)
-        volumes = self.scanner.get_volumes(inst_key)
-
-        if not (prices and highs and lows and closes and volumes):
-            return None
+            return False
 
         # ==================================================
-        # 2️⃣ UPDATE MTF BUILDER (FROM 1m)
+        # 2️⃣ UPDATE MTF BUILDER (FROM CLOSED 1m BARS)
         # ==================================================
-        last_bar = self.scanner.get_last_n_bars(inst_key, 1)
-        if not last_bar:
-            return None
-
-        bar = last_bar[0]
+        # the newest scanner bar is still forming; the 5m / 15m candles
+        # (and everything cached per bar on them) use closed minutes only.
+        # Fed on every tick, the same closed bar just replaces itself.
+        bar = self.scanner.get_last_closed_bar(inst_key)
+        if not bar:
+            return False
 
         self.mtf_builder.update(
             inst_key,
@@ -56,88 +243,113 @@ class StrategyEngine:
             bar["close"],
             bar["volume"]
         )
-
-        # ==================================================
-        # 3️⃣ GET MULTI TIMEFRAME DATA
-        # ==================================================
-        candle_5m = self.mtf_builder.get_latest_5m(inst_key)
-        candle_15m = self.mtf_builder.get_latest_15m(inst_key)
-
-        hist_5m = self.mtf_builder.get_tf_history(inst_key, minutes=5, lookback=150)
-        hist_5m_small = self.mtf_builder.get_tf_history(inst_key, minutes=5, lookback=3)
-        hist_15m = self.mtf_builder.get_tf_history(inst_key, minutes=15, lookback=50)
-
-        if not hist_5m or len(hist_5m) < 60:
+        return True
+
+    def _evaluate_synced(self, inst_key: str, ltp: float):
+        """
+        Stages run cheapest first and stop at the first failing gate:
+        data → VWAP update → session → HTF bias → regime → MTF → pullback
+        → decision. HTF / regime come from the per-bar cache, so the
+        per-tick 5m / 15m aggregation of the MTF stage only runs for
+        instruments that passed them.
+        """
+
+        # 1m series read once (float64) + measurements shared by the
+        # pullback detector and the decision
+        signal_ctx = build_context(self.scanner, inst_key)
+        if signal_ctx is None:
             return None
 
-        # ==================================================
-        # 4️⃣ MTF CONTEXT
-        # ==================================================
-        mtf_ctx = analyze_mtf(
-            candle_5m,
-            candle_15m,
-            history_5m=hist_5m_small,
-            history_15m=hist_15m
-        )
+        highs = signal_ctx.highs
+        lows = signal_ctx.lows
+        closes = signal_ctx.closes
+        volumes = signal_ctx.volumes
+        prices = closes  # get_prices is the close column
 
-        if mtf_ctx.direction == "NEUTRAL" or mtf_ctx.conflict:
+        # cheap length gate before any aggregation
+        if self.mtf_builder.bar_count(inst_key) < MIN_5M_CANDLES * 5:
             return None
 
         # ==================================================
-        # 5️⃣ VWAP (1m continuous)
+        # 3️⃣ VWAP (1m continuous)
         # ==================================================
-        if inst_key not in self.vwap_calculators:
-            self.vwap_calculators[inst_key] = VWAPCalculator()
-
+        # O(1); updated before the gates so the session VWAP sees every tick
         vwap_calc = self.vwap_calculators[inst_key]
 
+        last_ts = self.scanner.get_last_ts(inst_key)
+
         vwap_calc.update(
             ltp,
-            volumes[-1] if volumes else 0
+            volumes[-1] if len(volumes) else 0,
+            session_day=last_ts[:10] if last_ts else None
         )
 
         vwap_ctx = vwap_calc.get_context(ltp)
 
         # ==================================================
-        # 6️⃣ HTF BIAS (USE 5m/15m BUILT DATA)
+        # 4️⃣ SESSION BOUNDARY
+        # ==================================================
+        # the opening bar's 5m / 15m windows still span the overnight gap
+        if last_ts and _is_first_candle_after_break(last_ts):
+            return None
+
+        # per-bar SR / ATR / regime / HTF structure (cached within the bar)
+        bar_ctx = self._bar_context(inst_key, highs, lows, closes)
+
         # ==================================================
-        htf_bias = get_htf_bias(
-            candles_5m=hist_5m,
+        # 5️⃣ HTF BIAS (USE 5m/15m BUILT DATA)
+        # ==================================================
+        # cached structure (closed 5m candles) + VWAP side at the live price
+        htf_bias = apply_vwap_bias(
+            bar_ctx.htf,
+            price=signal_ctx.price,
             vwap_value=vwap_ctx.vwap
         )
 
-        # 🔥 FINAL DIRECTION AUTHORITY
-        if mtf_ctx.direction != htf_bias.direction:
-            return None
-
         direction = htf_bias.direction
 
+        # NEUTRAL never matches a non-neutral MTF direction (step 7)
+        if direction == "NEUTRAL":
+            return None
+
         # ==================================================
-        # 7️⃣ MARKET REGIME (FIXED → USE 5m DATA)
+        # 6️⃣ MARKET REGIME (FIXED → USE 5m DATA)
         # ==================================================
-        highs_5m = [c["high"] for c in hist_5m]
-        lows_5m = [c["low"] for c in hist_5m]
-        closes_5m = [c["close"] for c in hist_5m]
-
-        regime = detect_market_regime(
-            highs=highs_5m,
-            lows=lows_5m,
-            closes=closes_5m
-        )
+        regime = bar_ctx.regime
 
         # Soft filter
         if regime.state in ("WEAK", "COMPRESSION"):
             return None
 
+        # ==================================================
+        # 7️⃣ MTF CONTEXT
+        # ==================================================
+        mtf_ctx = self._mtf_context(inst_key, bar_ctx.ts)
+
+        if mtf_ctx.direction == "NEUTRAL" or mtf_ctx.conflict:
+            return None
+
+        # 🔥 FINAL DIRECTION AUTHORITY
+        if mtf_ctx.direction != direction:
+            return None
+
         # ==================================================
         # 8️⃣ PULLBACK SETUP (1m timing)
         # ==================================================
+        highs_5m, lows_5m, _, _ = self.mtf_builder.get_tf_history_arrays(
+            inst_key, minutes=5, lookback=150
+        )
+
         pullback = detect_pullback_signal(
             prices=prices,
             highs=highs_5m,
             lows=lows_5m,
             closes=closes,
-            htf_direction=direction
+            volumes=volumes,
+            htf_direction=direction,
+            sr_levels=bar_ctx.sr_levels,
+            atr_value=bar_ctx.atr,
+            signal_ctx=signal_ctx
         )
 
         if not pullback:
@@ -146,7 +358,7 @@ class StrategyEngine:
         # ==================================================
         # 9️⃣ FINAL DECISION
         # ==================================================
-        decision = final_trade_decision(
+        decision = self._decide(
             inst_key=inst_key,
             prices=prices,
             highs=highs,
@@ -156,12 +368,13 @@ class StrategyEngine:
             market_regime=regime.state,
             htf_bias_direction=direction,
             vwap_ctx=vwap_ctx,
-            pullback_signal=pullback
+            pullback_signal=pullback,
+            signal_ctx=signal_ctx
         )
 
         # Debug info (optional)
-        decision.components["mtf"] = mtf_ctx.direction
-        decision.components["htf"] = htf_bias.label
-        decision.components["regime"] = regime.state
+        decision.components.mtf_label = mtf_ctx.direction
+        decision.components.htf_label = htf_bias.label
+        decision.components.regime_label = regime.state
 
         return decision
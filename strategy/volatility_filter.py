@@ -13,6 +13,11 @@ Score range: -1.5 .. +1.5 (conservative)
 from dataclasses import dataclass
 from typing import List, Optional
 
+import numpy as np
+
+from strategy._njit import njit
+from strategy.market_regime import compute_true_range as _tr_vector
+
 
 # =========================
 # Core ATR Calculations
@@ -33,23 +38,77 @@ def compute_true_range(highs: List[float], lows: List[float], closes: List[float
     return tr
 
 
+@njit("f8(f8[:], f8[:], f8[:], i8)", cache=True, nogil=True)
+def _atr_kernel(highs, lows, closes, period):
+    """
+    Mean true range of the last `period` bars, TR computed on the fly
+    (no TR array). Same per-bar max and summation order as
+    compute_true_range + sum, so results match the Python version.
+    """
+    n = highs.shape[0]
+    tr_sum = 0.0
+    for i in range(n - period, n):
+        tr = highs[i] - lows[i]
+        hc = abs(highs[i] - closes[i - 1])
+        lc = abs(lows[i] - closes[i - 1])
+        if hc > tr:
+            tr = hc
+        if lc > tr:
+            tr = lc
+        tr_sum += tr
+    return tr_sum / period
+
+
 def compute_atr(
     highs: List[float],
     lows: List[float],
     closes: List[float],
     period: int = 14
 ) -> Optional[float]:
-    tr = compute_true_range(highs, lows, closes)
-    if len(tr) < period:
+    n = len(highs)
+    if n - 1 < period:
         return None
-    return sum(tr[-period:]) / period
+    if len(lows) < n or len(closes) < n - 1:
+        raise IndexError("lows / closes shorter than highs")
+
+    # only the last period + 1 bars are needed: O(period), not O(n);
+    # float64 also for float32 input (accumulate at full precision)
+    start = n - period - 1
+    return float(_atr_kernel(
+        np.asarray(highs[start:], dtype=np.float64),
+        np.asarray(lows[start:n], dtype=np.float64),
+        np.asarray(closes[start:n - 1], dtype=np.float64),
+        period
+    ))
+
+
+def compute_sma_atr_series(
+    highs: List[float],
+    lows: List[float],
+    closes: List[float],
+    period: int = 14
+) -> np.ndarray:
+    """
+    compute_atr for every bar at once (backtests): the `period`-bar mean of
+    the vectorised true range, as one np.convolve over the whole series.
+    Element k is the ATR once bar k + period is in, so series[-1] equals
+    compute_atr(highs, lows, closes) up to float rounding. Empty while
+    there are fewer than period + 1 bars.
+
+    Simple moving average of the true range, not Wilder's smoothing as in
+    market_regime.compute_atr_series.
+    """
+    tr = _tr_vector(highs, lows, closes)
+    if len(tr) < period:
+        return np.empty(0, dtype=np.float64)
+    return np.convolve(tr, np.full(period, 1.0 / period), mode="valid")
 
 
 # =========================
 # Volatility Context Output
 # =========================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class VolatilityContext:
     state: str          # CONTRACTING | BUILDING | EXPANDING | EXHAUSTION
     score: float        # -1.5 .. +1.5
@@ -57,6 +116,18 @@ class VolatilityContext:
     move_pct_atr: float
     comment: str
 
+    def __repr__(self) -> str:
+        # display rounding only; the fields keep full precision
+        return (
+            f"VolatilityContext(state={self.state!r}, score={self.score!r}, "
+            f"atr={round(self.atr, 6)!r}, move_pct_atr={round(self.move_pct_atr, 2)!r}, "
+            f"comment={self.comment!r})"
+        )
+
+
+# shared result when no ATR is available (contexts are immutable)
+_VOLATILITY_UNAVAILABLE = VolatilityContext("UNKNOWN", 0.0, 0.0, 0.0, "ATR unavailable")
+
 
 # =========================
 # Volatility Intelligence
@@ -78,9 +149,7 @@ def analyze_volatility(
     """
 
     if atr_value is None or atr_value <= 0:
-        return VolatilityContext(
-            "UNKNOWN", 0.0, 0.0, 0.0, "ATR unavailable"
-        )
+        return _VOLATILITY_UNAVAILABLE
 
     move_pct_atr = abs(current_move) / atr_value
 
@@ -91,8 +160,8 @@ def analyze_volatility(
         return VolatilityContext(
             state="CONTRACTING",
             score=-0.6,
-            atr=round(atr_value, 6),
-            move_pct_atr=round(move_pct_atr, 2),
+            atr=atr_value,
+            move_pct_atr=move_pct_atr,
             comment="volatility_too_low"
         )
 
@@ -103,8 +172,8 @@ def analyze_volatility(
         return VolatilityContext(
             state="BUILDING",
             score=0.2,
-            atr=round(atr_value, 6),
-            move_pct_atr=round(move_pct_atr, 2),
+            atr=atr_value,
+            move_pct_atr=move_pct_atr,
             comment="volatility_building"
         )
 
@@ -124,8 +193,8 @@ def analyze_volatility(
         return VolatilityContext(
             state="EXPANDING",
             score=min(score, 1.5),
-            atr=round(atr_value, 6),
-            move_pct_atr=round(move_pct_atr, 2),
+            atr=atr_value,
+            move_pct_atr=move_pct_atr,
             comment=comment
         )
 
@@ -135,8 +204,8 @@ def analyze_volatility(
     return VolatilityContext(
         state="EXHAUSTION",
         score=-1.0,
-        atr=round(atr_value, 6),
-        move_pct_atr=round(move_pct_atr, 2),
+        atr=atr_value,
+        move_pct_atr=move_pct_atr,
         comment="volatility_spike_risk"
     )
 
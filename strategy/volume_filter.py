@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import List, Optional
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class VolumeContext:
     score: float               # -2 to +2
     strength: str              # STRONG | MODERATE | WEAK | NONE
@@ -12,6 +12,10 @@ class VolumeContext:
     comment: str
 
 
+# shared result while the history is too short (contexts are immutable)
+_VOLUME_INSUFFICIENT = VolumeContext(0.0, "NONE", "FLAT", "Insufficient volume data")
+
+
 def analyze_volume(
     volume_history: List[float],
     close_prices: Optional[List[float]] = None,
@@ -32,11 +36,12 @@ def analyze_volume(
       negative indicates weak / absorbing volume
     """
 
-    if not volume_history or len(volume_history) < lookback + rising_bars:
-        return VolumeContext(0.0, "NONE", "FLAT", "Insufficient volume data")
+    if volume_history is None or len(volume_history) < lookback + rising_bars:
+        return _VOLUME_INSUFFICIENT
 
     recent = volume_history[-lookback:]
-    avg_volume = sum(recent) / lookback if lookback > 0 else 0
+    # float() each value: float32 arrays would otherwise sum in float32
+    avg_volume = sum(map(float, recent)) / lookback if lookback > 0 else 0
     current_volume = volume_history[-1]
 
     # ----------------------
@@ -77,7 +82,7 @@ def analyze_volume(
     # 3) Price–Volume Relationship
     # ----------------------
     comment = ""
-    if close_prices and len(close_prices) >= rising_bars:
+    if close_prices is not None and len(close_prices) >= rising_bars:
         price_move = close_prices[-1] - close_prices[-rising_bars]
         # small threshold guard for price motion
         if abs(price_move) < 0.002 * close_prices[-1]:
@@ -8,7 +8,7 @@ from typing import Optional
 # VWAP Context Output
 # =========================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class VWAPContext:
     vwap: Optional[float]
     distance_pct: float             # price minus VWAP as percent
@@ -18,6 +18,27 @@ class VWAPContext:
     score: float                    # -2 to +2 (for decision_engine scoring)
     comment: str
 
+    def __repr__(self) -> str:
+        # display rounding only; the fields keep full precision
+        vwap = None if self.vwap is None else round(self.vwap, 6)
+        return (
+            f"VWAPContext(vwap={vwap!r}, distance_pct={round(self.distance_pct, 3)!r}, "
+            f"slope={round(self.slope, 6)!r}, acceptance={self.acceptance!r}, "
+            f"pressure={self.pressure!r}, score={self.score!r}, comment={self.comment!r})"
+        )
+
+
+# shared result while there is no VWAP (contexts are immutable)
+_VWAP_UNAVAILABLE = VWAPContext(
+    vwap=None,
+    distance_pct=0.0,
+    slope=0.0,
+    acceptance="NEAR",
+    pressure="NEUTRAL",
+    score=0.0,
+    comment="VWAP not available"
+)
+
 
 # =========================
 # VWAP Calculator
@@ -28,7 +49,7 @@ class VWAPCalculator:
     Intraday VWAP calculator + context.
 
     Usage:
-      - reset() at session start
+      - reset() at session start, or pass session_day to update()
       - update(price, volume) per tick or per bar
       - get_vwap(): current VWAP
       - get_context(price): returns VWAPContext with score
@@ -40,8 +61,13 @@ class VWAPCalculator:
 
         self.price_volume_sum = 0.0
         self.volume_sum = 0.0
+        self.last_session_day = None
 
-        self.vwap_history = deque(maxlen=slope_window)
+        # last slope_window VWAPs as a fixed ring: next write slot + fill count
+        self._slope_size = max(slope_window, 1)
+        self._slope_ring = [0.0] * self._slope_size
+        self._slope_head = 0
+        self._slope_n = 0
 
         if window:
             self.price_volume_deque = deque(maxlen=window)
@@ -55,26 +81,39 @@ class VWAPCalculator:
         """
         self.price_volume_sum = 0.0
         self.volume_sum = 0.0
-        self.vwap_history.clear()
+        self._slope_head = 0
+        self._slope_n = 0
 
         if hasattr(self, "price_volume_deque"):
             self.price_volume_deque.clear()
             self.volume_deque.clear()
 
-    def update(self, price: float, volume: float) -> Optional[float]:
+    def update(self, price: float, volume: float, session_day: Optional[str] = None) -> Optional[float]:
         """
         Update VWAP running sums with new price & volume.
-        If window is set, it rolls using deques.
+        If window is set, it rolls using deques (sums kept incrementally).
+        If session_day (e.g. "YYYY-MM-DD") changes, the sums are reset first.
         """
+        if session_day is not None and session_day != self.last_session_day:
+            self.reset()
+            self.last_session_day = session_day
+
         if price is None or volume is None or volume <= 0:
             return None
 
+        # accumulate in Python floats (float64) even if fed NumPy float32
+        price = float(price)
+        volume = float(volume)
+
         if self.window:
+            # rolling sums in O(1): drop the bar the deque is about to evict
+            if len(self.volume_deque) == self.window:
+                self.price_volume_sum -= self.price_volume_deque[0]
+                self.volume_sum -= self.volume_deque[0]
             self.price_volume_deque.append(price * volume)
             self.volume_deque.append(volume)
-            # recompute sums from deques
-            self.price_volume_sum = sum(self.price_volume_deque)
-            self.volume_sum = sum(self.volume_deque)
+            self.price_volume_sum += price * volume
+            self.volume_sum += volume
         else:
             # accumulate full session sums
             self.price_volume_sum += price * volume
@@ -84,7 +123,10 @@ class VWAPCalculator:
             return None
 
         vwap = self.price_volume_sum / self.volume_sum
-        self.vwap_history.append(vwap)
+        self._slope_ring[self._slope_head] = vwap
+        self._slope_head = (self._slope_head + 1) % self._slope_size
+        if self._slope_n < self._slope_size:
+            self._slope_n += 1
         return vwap
 
     def get_vwap(self) -> Optional[float]:
@@ -115,22 +157,17 @@ class VWAPCalculator:
 
         # no VWAP available
         if vwap is None or price is None:
-            return VWAPContext(
-                vwap=None,
-                distance_pct=0.0,
-                slope=0.0,
-                acceptance="NEAR",
-                pressure="NEUTRAL",
-                score=0.0,
-                comment="VWAP not available"
-            )
+            return _VWAP_UNAVAILABLE
 
         # distance from VWAP in percent
         distance_pct = (price - vwap) / vwap * 100.0
 
         # slope over recent history
-        if len(self.vwap_history) >= 2:
-            slope = self.vwap_history[-1] - self.vwap_history[0]
+        n = self._slope_n
+        if n >= 2:
+            head = self._slope_head
+            size = self._slope_size
+            slope = self._slope_ring[(head - 1) % size] - self._slope_ring[(head - n) % size]
         else:
             slope = 0.0
 
@@ -165,9 +202,9 @@ class VWAPCalculator:
         score = max(min(score, 2.0), -2.0)
 
         return VWAPContext(
-            vwap=round(vwap, 6),
-            distance_pct=round(distance_pct, 3),
-            slope=round(slope, 6),
+            vwap=vwap,
+            distance_pct=distance_pct,
+            slope=slope,
             acceptance=acceptance,
             pressure=pressure,
             score=score,